@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+
+MEASURES = ['Sale Amount', 'Assessed Value', 'Sales Ratio']
+# Statistik cukup untuk regresi OLS Sale Amount ~ Assessed Value per sel
+OLS_STATS = ['n', 'sx', 'sy', 'sxx', 'sxy']
+
+# Sketch kuantil bergaya DDSketch: bucket logaritmik dengan error relatif ~1%.
+# Indeks bucket bersifat absolut sehingga dua sketch bisa digabung cukup dengan menjumlahkan count.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(GAMMA)
+_MIN_POSITIVE = 1e-9
+
+
+def bucket_index(values):
+    # Nilai <= 0 tidak punya bucket log; dihitung terpisah sebagai bucket nol
+    positive = values > _MIN_POSITIVE
+    idx = np.zeros(len(values), dtype=np.int64)
+    idx[positive] = np.ceil(np.log(values[positive]) / _LOG_GAMMA).astype(np.int64)
+    return idx, positive
+
+
+def bucket_value(idx):
+    return 2 * GAMMA ** idx / (GAMMA + 1)
+
+
+def sales_ratio(df):
+    return (df['Assessed Value'] / df['Sale Amount']).replace([np.inf, -np.inf], np.nan)
+
+
+class Cube:
+    # Agregat ringkas per (Year, Property Type): count, sum, dan sketch kuantil per measure.
+    # Sumbu: years x types (x buckets untuk sketch).
+
+    def __init__(self, years, types, rows, n, sums, zeros, sketches, offsets, ols):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.types = list(types)
+        self.rows = rows
+        self.n = n
+        self.sums = sums
+        self.zeros = zeros
+        self.sketches = sketches
+        self.offsets = offsets
+        self.ols = ols
+
+    @classmethod
+    def kosong(cls, years, types):
+        shape = (len(years), len(types))
+        return cls(years, types, np.zeros(shape, dtype=np.int64),
+                   {m: np.zeros(shape, dtype=np.int64) for m in MEASURES},
+                   {m: np.zeros(shape, dtype=np.float64) for m in MEASURES},
+                   {m: np.zeros(shape, dtype=np.int64) for m in MEASURES},
+                   {m: np.zeros(shape + (0,), dtype=np.int64) for m in MEASURES},
+                   {m: 0 for m in MEASURES},
+                   {k: np.zeros(shape, dtype=np.float64) for k in OLS_STATS})
+
+    @classmethod
+    def dari_dataframe(cls, df):
+        years = np.unique(df['Year'].to_numpy())
+        property_type = df['Property Type'].astype('category')
+        types = list(property_type.cat.categories)
+        cube = cls.kosong(years, types)
+        cube.tambah(df)
+        return cube
+
+    def _sel(self, year_range=None, types=None):
+        y = np.ones(len(self.years), dtype=bool)
+        if year_range is not None:
+            y = (self.years >= year_range[0]) & (self.years <= year_range[1])
+        t = np.ones(len(self.types), dtype=bool)
+        if types is not None:
+            t = np.isin(np.asarray(self.types, dtype=object), list(types))
+        return y, t
+
+    def _perluas(self, years, types):
+        # Tambahkan Year/Property Type baru ke sumbu cube (dipakai saat merge / data baru)
+        years = np.union1d(self.years, years)
+        types = self.types + [t for t in types if t not in self.types]
+        if len(years) == len(self.years) and len(types) == len(self.types):
+            return
+        yi = np.searchsorted(years, self.years)
+        ti = np.arange(len(self.types))
+
+        def pindah(arr):
+            baru = np.zeros((len(years), len(types)) + arr.shape[2:], dtype=arr.dtype)
+            baru[np.ix_(yi, ti)] = arr
+            return baru
+
+        self.rows = pindah(self.rows)
+        for m in MEASURES:
+            self.n[m] = pindah(self.n[m])
+            self.sums[m] = pindah(self.sums[m])
+            self.zeros[m] = pindah(self.zeros[m])
+            self.sketches[m] = pindah(self.sketches[m])
+        for k in OLS_STATS:
+            self.ols[k] = pindah(self.ols[k])
+        self.years, self.types = years, types
+
+    def _tambah_sketch(self, m, offset, counts):
+        # Gabungkan sketch dengan rentang bucket berbeda ke rentang gabungan
+        lama = self.sketches[m]
+        if counts.shape[2] == 0:
+            return
+        if lama.shape[2] == 0:
+            self.sketches[m], self.offsets[m] = counts.copy(), offset
+            return
+        lo = min(self.offsets[m], offset)
+        hi = max(self.offsets[m] + lama.shape[2], offset + counts.shape[2])
+        if lo != self.offsets[m] or hi != self.offsets[m] + lama.shape[2]:
+            baru = np.zeros(lama.shape[:2] + (hi - lo,), dtype=np.int64)
+            baru[:, :, self.offsets[m] - lo:self.offsets[m] - lo + lama.shape[2]] = lama
+            self.sketches[m], self.offsets[m] = baru, lo
+        s = offset - self.offsets[m]
+        self.sketches[m][:, :, s:s + counts.shape[2]] += counts
+
+    def tambah(self, df):
+        # Masukkan baris baru ke cube (one-pass, bisa dipanggil per chunk)
+        if len(df) == 0:
+            return self
+        property_type = df['Property Type'].astype(str).to_numpy()
+        year = df['Year'].to_numpy()
+        self._perluas(np.unique(year), list(dict.fromkeys(property_type)))
+
+        yi = np.searchsorted(self.years, year)
+        ti = pd.Index(self.types).get_indexer(property_type)
+        shape = (len(self.years), len(self.types))
+        cell = yi * shape[1] + ti
+        size = shape[0] * shape[1]
+        self.rows += np.bincount(cell, minlength=size).reshape(shape)
+
+        kolom = {
+            'Sale Amount': df['Sale Amount'].to_numpy(dtype=np.float64),
+            'Assessed Value': df['Assessed Value'].to_numpy(dtype=np.float64),
+            'Sales Ratio': sales_ratio(df).to_numpy(dtype=np.float64),
+        }
+        for m, values in kolom.items():
+            valid = np.isfinite(values)
+            c, v = cell[valid], values[valid]
+            self.n[m] += np.bincount(c, minlength=size).reshape(shape)
+            self.sums[m] += np.bincount(c, weights=v, minlength=size).reshape(shape)
+
+            idx, positive = bucket_index(v)
+            self.zeros[m] += np.bincount(c[~positive], minlength=size).reshape(shape)
+            if positive.any():
+                idx, c = idx[positive], c[positive]
+                offset = int(idx.min())
+                width = int(idx.max()) - offset + 1
+                counts = np.bincount(c * width + (idx - offset), minlength=size * width)
+                self._tambah_sketch(m, offset, counts.reshape(shape + (width,)))
+
+        x, y = kolom['Assessed Value'], kolom['Sale Amount']
+        valid = np.isfinite(x) & np.isfinite(y)
+        c, x, y = cell[valid], x[valid], y[valid]
+        for k, w in zip(OLS_STATS, [None, x, y, x * x, x * y]):
+            self.ols[k] += np.bincount(c, weights=w, minlength=size).reshape(shape)
+        return self
+
+    def merge(self, other):
+        self._perluas(other.years, other.types)
+        yi = np.searchsorted(self.years, other.years)
+        ti = pd.Index(self.types).get_indexer(other.types)
+        idx = np.ix_(yi, ti)
+        self.rows[idx] += other.rows
+        for m in MEASURES:
+            self.n[m][idx] += other.n[m]
+            self.sums[m][idx] += other.sums[m]
+            self.zeros[m][idx] += other.zeros[m]
+            counts = np.zeros((len(self.years), len(self.types), other.sketches[m].shape[2]), dtype=np.int64)
+            counts[idx] = other.sketches[m]
+            self._tambah_sketch(m, other.offsets[m], counts)
+        for k in OLS_STATS:
+            self.ols[k][idx] += other.ols[k]
+        return self
+
+    def _quantile(self, m, zeros, sketch, q):
+        total = zeros + sketch.sum(axis=-1)
+        cum = np.cumsum(sketch, axis=-1)
+        hasil = np.full(total.shape, np.nan)
+        for pos in np.ndindex(total.shape):
+            if total[pos] == 0:
+                continue
+            rank = q * (total[pos] - 1)
+            if rank < zeros[pos]:
+                hasil[pos] = 0.0
+            else:
+                i = np.searchsorted(cum[pos], rank - zeros[pos], side='right')
+                hasil[pos] = bucket_value(self.offsets[m] + i)
+        return hasil
+
+    def quantile(self, m, q, year_range=None, types=None, by=None):
+        # by=None -> satu nilai; by='Year' atau 'Property Type' -> array per grup
+        y, t = self._sel(year_range, types)
+        zeros = self.zeros[m][y][:, t]
+        sketch = self.sketches[m][y][:, t]
+        if by is None:
+            return float(self._quantile(m, np.array(zeros.sum()), sketch.sum(axis=(0, 1)), q))
+        axis = 1 if by == 'Year' else 0
+        return self._quantile(m, zeros.sum(axis=axis), sketch.sum(axis=axis), q)
+
+    def yearly(self, year_range=None, types=None):
+        # Pengganti filtered_df.groupby('Year').agg(mean)
+        y, t = self._sel(year_range, types)
+        hasil = pd.DataFrame({'Year': self.years[y]})
+        for m in ['Sale Amount', 'Assessed Value']:
+            n = self.n[m][y][:, t].sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                hasil[m] = self.sums[m][y][:, t].sum(axis=1) / n
+        rows = self.rows[y][:, t].sum(axis=1)
+        return hasil[rows > 0].reset_index(drop=True)
+
+    def per_type(self, year_range=None, types=None):
+        # Pengganti filtered_df.groupby('Property Type').agg(mean, median, count)
+        y, t = self._sel(year_range, types)
+        m = 'Sale Amount'
+        n = self.n[m][y][:, t].sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sums[m][y][:, t].sum(axis=0) / n
+        hasil = pd.DataFrame({
+            'Property Type': np.asarray(self.types, dtype=object)[t],
+            'Mean Price': mean,
+            'Median Price': self.quantile(m, 0.5, year_range, types, by='Property Type'),
+            'Count': n,
+        })
+        rows = self.rows[y][:, t].sum(axis=0)
+        return hasil[rows > 0].reset_index(drop=True)
+
+    def trendline(self, year_range=None, types=None):
+        # Koefisien OLS (closed form) per Property Type, pengganti trendline="ols" statsmodels
+        y, t = self._sel(year_range, types)
+        s = {k: self.ols[k][y][:, t].sum(axis=0) for k in OLS_STATS}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var_x = s['sxx'] - s['sx'] ** 2 / s['n']
+            cov_xy = s['sxy'] - s['sx'] * s['sy'] / s['n']
+            slope = cov_xy / var_x
+            intercept = (s['sy'] - slope * s['sx']) / s['n']
+        hasil = pd.DataFrame({
+            'Property Type': np.asarray(self.types, dtype=object)[t],
+            'slope': slope,
+            'intercept': intercept,
+            'n': s['n'].astype(np.int64),
+        })
+        return hasil[hasil['n'] > 1].reset_index(drop=True)
+
+    def box_stats(self, m, by, year_range=None, types=None):
+        # Statistik box plot per grup dari sketch (tanpa baris mentah); whisker 1.5 IQR
+        # dibatasi nilai minimum/maksimum yang tercatat di sketch
+        y, t = self._sel(year_range, types)
+        axis = 1 if by == 'Year' else 0
+        label = self.years[y] if by == 'Year' else np.asarray(self.types, dtype=object)[t]
+        q = {p: self.quantile(m, p, year_range, types, by=by) for p in [0, 0.25, 0.5, 0.75, 1]}
+        n = self.n[m][y][:, t].sum(axis=axis)
+        iqr = q[0.75] - q[0.25]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = pd.DataFrame({
+                by: label,
+                'q1': q[0.25],
+                'median': q[0.5],
+                'q3': q[0.75],
+                'lowerfence': np.maximum(q[0], q[0.25] - 1.5 * iqr),
+                'upperfence': np.minimum(q[1], q[0.75] + 1.5 * iqr),
+                'mean': self.sums[m][y][:, t].sum(axis=axis) / n,
+                'n': n,
+            })
+        return stats[n > 0].reset_index(drop=True)
+
+    def histogram(self, m, year_range=None, types=None):
+        # Histogram per Property Type dengan bin logaritmik dari bucket sketch
+        y, t = self._sel(year_range, types)
+        counts = self.sketches[m][y][:, t].sum(axis=0)
+        edges = GAMMA ** (self.offsets[m] - 1 + np.arange(counts.shape[1] + 1))
+        return edges, list(np.asarray(self.types, dtype=object)[t]), counts
+
+    def simpan(self, path):
+        arrays = {'years': self.years, 'types': np.asarray(self.types, dtype=str), 'rows': self.rows}
+        for m in MEASURES:
+            arrays[f'n/{m}'] = self.n[m]
+            arrays[f'sums/{m}'] = self.sums[m]
+            arrays[f'zeros/{m}'] = self.zeros[m]
+            arrays[f'sketches/{m}'] = self.sketches[m]
+            arrays[f'offsets/{m}'] = np.asarray(self.offsets[m])
+        for k in OLS_STATS:
+            arrays[f'ols/{k}'] = self.ols[k]
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def muat(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['years'], data['types'].tolist(), data['rows'],
+                {m: data[f'n/{m}'] for m in MEASURES},
+                {m: data[f'sums/{m}'] for m in MEASURES},
+                {m: data[f'zeros/{m}'] for m in MEASURES},
+                {m: data[f'sketches/{m}'] for m in MEASURES},
+                {m: int(data[f'offsets/{m}']) for m in MEASURES},
+                {k: data[f'ols/{k}'] for k in OLS_STATS},
+            )
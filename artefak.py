@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import inferensi_numpy
+
+ARTEFAK_DIR = 'real_estate_model.artifact'
+BOOSTER_FILE = 'booster.ubj'
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def hash_file(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for blok in iter(lambda: f.read(chunk), b''):
+            h.update(blok)
+    return h.hexdigest()
+
+
+def ekspor(model, directory=ARTEFAK_DIR, source_path=None):
+    # Booster disimpan dalam format native XGBoost (UBJSON, stabil antar versi), preprocessing
+    # dan tree dalam bentuk .npy terpisah supaya bisa dibaca lewat memory mapping
+    import sklearn
+    import xgboost
+
+    model_numpy = inferensi_numpy.ekspor(model)
+    os.makedirs(directory, exist_ok=True)
+    model.named_steps['regressor'].get_booster().save_model(os.path.join(directory, BOOSTER_FILE))
+    for nama, arr in model_numpy.arrays.items():
+        np.save(os.path.join(directory, f'{nama}.npy'), np.ascontiguousarray(arr))
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'spec': model_numpy.spec,
+        'arrays': sorted(model_numpy.arrays),
+        'booster': BOOSTER_FILE,
+        'source_sha256': hash_file(source_path) if source_path else None,
+        'exported_with': {'xgboost': xgboost.__version__, 'sklearn': sklearn.__version__},
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return directory
+
+
+def baca_manifest(directory=ARTEFAK_DIR):
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {manifest['format_version']}")
+    return manifest
+
+
+def _arrays(directory, manifest):
+    # mmap_mode='r': halaman file dibagi lewat page cache OS oleh semua proses worker
+    return {nama: np.load(os.path.join(directory, f'{nama}.npy'), mmap_mode='r', allow_pickle=False)
+            for nama in manifest['arrays']}
+
+
+class ModelArtefak:
+    # Preprocessing dari array (mmap) + booster native XGBoost, tanpa unpickle sklearn
+
+    def __init__(self, directory=ARTEFAK_DIR):
+        import xgboost as xgb
+
+        self.manifest = baca_manifest(directory)
+        self._numpy = inferensi_numpy.ModelNumpy(self.manifest['spec'], _arrays(directory, self.manifest))
+        self.booster = xgb.Booster(model_file=os.path.join(directory, self.manifest['booster']))
+
+    def transform(self, data):
+        return self._numpy.transform(data)
+
+    def predict(self, data):
+        # transform() sudah mengubah 0 menjadi NaN bila pipeline aslinya sparse
+        return self.booster.inplace_predict(self.transform(data), missing=np.nan)
+
+
+def muat(directory=ARTEFAK_DIR, backend='xgboost'):
+    # backend='numpy' -> ModelNumpy dengan array mmap (tanpa xgboost sama sekali)
+    if backend == 'numpy':
+        manifest = baca_manifest(directory)
+        return inferensi_numpy.ModelNumpy(manifest['spec'], _arrays(directory, manifest))
+    return ModelArtefak(directory)
+
+
+def pastikan(model_path, directory=ARTEFAK_DIR):
+    # Direktori artefak tidak ikut di git: diekspor dari .pkl jika belum ada atau dibuat dari model lain,
+    # diverifikasi (kedua backend) di direktori sementara, baru kemudian menggantikan yang lama
+    sumber = hash_file(model_path)
+    try:
+        if baca_manifest(directory)['source_sha256'] == sumber:
+            return muat(directory)
+    except (FileNotFoundError, ValueError):
+        pass
+
+    import joblib
+    model = joblib.load(model_path)
+    # Nama sementara unik per pemanggil, di filesystem yang sama supaya rename atomik; beberapa
+    # proses yang mengekspor bersamaan tidak saling menimpa
+    induk = os.path.dirname(os.path.abspath(directory))
+    nama = os.path.basename(os.path.abspath(directory))
+    tmp = tempfile.mkdtemp(prefix=nama + '.tmp-', dir=induk)
+    try:
+        ekspor(model, tmp, source_path=model_path)
+        data = inferensi_numpy.data_verifikasi(model_path)
+        for backend in ['xgboost', 'numpy']:
+            hasil = inferensi_numpy.verifikasi(model, muat(tmp, backend), data)
+            if not hasil['ok']:
+                raise ValueError(f"Artifact backend {backend} does not match the pipeline "
+                                 f"(max relative error {hasil['max_rel_error']:.2e})")
+        # Direktori lama dipindah ke samping (bukan dihapus) sebelum ditukar; pembaca yang sudah
+        # memetakan file lama tetap valid, dan baru dihapus setelah yang baru terpasang
+        lama = os.path.join(induk, os.path.basename(tmp).replace('.tmp-', '.old-', 1))
+        try:
+            os.rename(directory, lama)
+        except FileNotFoundError:
+            lama = None
+        try:
+            os.replace(tmp, directory)
+        except OSError:
+            # Proses lain memasang artefaknya lebih dulu; pakai milik mereka jika sumbernya sama
+            if baca_manifest(directory)['source_sha256'] != sumber:
+                raise
+        if lama is not None:
+            shutil.rmtree(lama, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return muat(directory)
+
+
+if __name__ == '__main__':
+    import joblib
+    import pandas as pd
+    from dataset import CSV_PATH
+    from praproses import FITUR, MODEL_PATH
+    from skor_batch import siapkan_fitur
+
+    parser = argparse.ArgumentParser(description="Ekspor model ke artefak native XGBoost + array mmap")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=ARTEFAK_DIR)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    ekspor(model, args.output, source_path=args.model)
+    data = siapkan_fitur(pd.read_csv(CSV_PATH, nrows=10_000))[FITUR]
+    for backend in ['xgboost', 'numpy']:
+        hasil = inferensi_numpy.verifikasi(model, muat(args.output, backend), data)
+        if not hasil['ok']:
+            raise SystemExit(f"Verifikasi backend {backend} gagal: {hasil['max_rel_error']:.2e}")
+    print(f"{args.output}: terverifikasi pada {len(data):,} baris")
@@ -0,0 +1,198 @@
+import argparse
+import atexit
+import glob
+import os
+import queue
+import threading
+import time
+import uuid
+
+AUDIT_DIR = os.environ.get('AUDIT_LOG_DIR', os.path.join('logs', 'audit'))
+MAX_QUEUE = 10_000
+BATCH = 512
+FLUSH_INTERVAL_S = 1.0
+# File segmen ditutup (footer Parquet ditulis) setelah sebanyak ini baris atau setelah terbuka
+# sekian detik, lalu segmen baru dibuka; segmen yang sudah ditutup langsung terbaca oleh baca()
+# dan crash paling banyak kehilangan isi satu segmen
+ROTASI_ROWS = 200_000
+ROTASI_DETIK = 60.0
+
+KOLOM = ['ts', 'source', 'model_sha256', 'backend', 'Assessed Value', 'Year', 'Property Type',
+         'Residential Type', 'prediction', 'latency_ms']
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('ts', pa.timestamp('us', tz='UTC')),
+        ('source', pa.dictionary(pa.int32(), pa.string())),
+        ('model_sha256', pa.dictionary(pa.int32(), pa.string())),
+        ('backend', pa.dictionary(pa.int32(), pa.string())),
+        ('Assessed Value', pa.float64()),
+        ('Year', pa.float64()),
+        ('Property Type', pa.dictionary(pa.int32(), pa.string())),
+        ('Residential Type', pa.dictionary(pa.int32(), pa.string())),
+        ('prediction', pa.float64()),
+        ('latency_ms', pa.float32()),
+    ])
+
+
+class AuditLog:
+    # Hot path hanya put_nowait ke antrian berbatas; thread penulis mengosongkan antrian per batch
+    # dan menulis satu row group Parquet per flush. Jika antrian penuh, record dibuang dan dihitung
+    # (prediksi tidak pernah menunggu disk).
+
+    def __init__(self, directory=AUDIT_DIR, max_queue=MAX_QUEUE, batch=BATCH,
+                 flush_interval=FLUSH_INTERVAL_S, rotasi_rows=ROTASI_ROWS, rotasi_detik=ROTASI_DETIK):
+        self.directory = directory
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.rotasi_rows = rotasi_rows
+        self.rotasi_detik = rotasi_detik
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._writer = None
+        self._segmen = None
+        self._baris_segmen = 0
+        self._dibuka = 0.0
+        self.diterima = self.dibuang = self.ditulis = self.flushes = self.gagal = 0
+        self._thread = threading.Thread(target=self._loop, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def catat(self, record):
+        record.setdefault('ts', time.time())
+        try:
+            self._queue.put_nowait(record)
+            self.diterima += 1
+        except queue.Full:
+            self.dibuang += 1
+
+    def statistik(self):
+        return {'diterima': self.diterima, 'dibuang': self.dibuang, 'ditulis': self.ditulis,
+                'flushes': self.flushes, 'gagal': self.gagal, 'antrian': self._queue.qsize()}
+
+    def _ambil_batch(self):
+        batch = []
+        batas = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch:
+            sisa = batas - time.monotonic()
+            if sisa <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=sisa))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._ambil_batch()
+            if batch:
+                try:
+                    self._tulis(batch)
+                except Exception:
+                    self.gagal += len(batch)
+            # Juga saat sepi: segmen yang sudah cukup lama ditutup walaupun tidak ada batch baru
+            if self._writer is not None and time.monotonic() - self._dibuka >= self.rotasi_detik:
+                self._tutup_segmen()
+        self._tutup_segmen()
+
+    def _tulis(self, batch):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            nama = f"audit-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}.parquet"
+            self._segmen = os.path.join(self.directory, nama)
+            # Segmen yang masih ditulis belum punya footer; pembaca hanya memakai file *.parquet
+            self._writer = pq.ParquetWriter(self._segmen + '.inprogress', _schema(), compression='zstd')
+            self._dibuka = time.monotonic()
+        schema = _schema()
+        arrays = []
+        for f in schema:
+            nilai = [r.get(f.name) for r in batch]
+            if f.name == 'ts':
+                arrays.append(pa.array([int(t * 1_000_000) for t in nilai], pa.int64()).cast(f.type))
+            elif pa.types.is_dictionary(f.type):
+                # Nilai non-string (mis. angka dari klien HTTP) disimpan sebagai teks, bukan
+                # menggagalkan seluruh batch
+                nilai = [None if v is None else str(v) for v in nilai]
+                arrays.append(pa.array(nilai, pa.string()).dictionary_encode().cast(f.type))
+            else:
+                arrays.append(pa.array(nilai, f.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        self.ditulis += len(batch)
+        self.flushes += 1
+        self._baris_segmen += len(batch)
+        if self._baris_segmen >= self.rotasi_rows:
+            self._tutup_segmen()
+
+    def _tutup_segmen(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._segmen + '.inprogress', self._segmen)
+            self._writer, self._baris_segmen = None, 0
+
+    def tutup(self, timeout=10.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+_logger = None
+_lock = threading.Lock()
+
+
+def logger():
+    # Satu logger per proses (halaman Streamlit dan layanan HTTP memanggil ini)
+    global _logger
+    with _lock:
+        if _logger is None:
+            _logger = AuditLog()
+            atexit.register(_logger.tutup)
+        return _logger
+
+
+def baca(directory=AUDIT_DIR, columns=None, sejak=None, sampai=None, filter=None):
+    # Scan semua segmen yang sudah ditutup: hanya kolom yang diminta dibaca, dan filter waktu
+    # didorong ke statistik row group sehingga row group di luar rentang dilewati
+    import pyarrow.dataset as ds
+    import pandas as pd
+
+    files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+    if not files:
+        return pd.DataFrame(columns=columns or KOLOM)
+    data = ds.dataset(files, format='parquet', schema=_schema())
+    kondisi = filter
+    for batas, op in [(sejak, 'ge'), (sampai, 'lt')]:
+        if batas is not None:
+            nilai = pd.Timestamp(batas, tz='UTC')
+            syarat = ds.field('ts') >= nilai if op == 'ge' else ds.field('ts') < nilai
+            kondisi = syarat if kondisi is None else kondisi & syarat
+    return data.to_table(columns=columns, filter=kondisi).to_pandas()
+
+
+def drift(directory=AUDIT_DIR, freq='D', sejak=None):
+    # Ringkasan per periode untuk analisis drift input/output
+    df = baca(directory, ['ts', 'Assessed Value', 'Year', 'Property Type', 'prediction', 'latency_ms'], sejak)
+    if df.empty:
+        return df
+    periode = df['ts'].dt.floor(freq)
+    ringkas = df.groupby(periode).agg(
+        n=('prediction', 'size'),
+        assessed_median=('Assessed Value', 'median'),
+        prediction_median=('prediction', 'median'),
+        prediction_p90=('prediction', lambda s: s.quantile(0.9)),
+        latency_p95=('latency_ms', lambda s: s.quantile(0.95)),
+    )
+    tipe = df.groupby([periode, 'Property Type'], observed=True).size().unstack(fill_value=0)
+    return ringkas.join(tipe.div(tipe.sum(axis=1), axis=0).add_prefix('share '))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Baca log audit prediksi untuk analisis drift")
+    parser.add_argument('--dir', default=AUDIT_DIR)
+    parser.add_argument('--sejak', default=None, help="Tanggal awal (mis. 2026-01-01)")
+    parser.add_argument('--freq', default='D', help="Periode ringkasan (D, W, h, ...)")
+    args = parser.parse_args()
+    print(drift(args.dir, args.freq, args.sejak).to_string())
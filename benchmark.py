@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregasi
+import dataset
+import grafik
+import praproses
+from praproses import FITUR, MODEL_PATH
+from skor_batch import siapkan_fitur
+
+BENCH_DIR = os.path.join(dataset.CACHE_DIR, 'bench')
+UKURAN = [30_000, 300_000, 3_000_000]
+# Median yang naik lebih dari ini dianggap regresi pada mode compare
+THRESHOLD = 0.20
+
+
+# ---------------------------------------------------------------------------
+# Data sintetis
+# ---------------------------------------------------------------------------
+
+def sintesis(n, path, sumber=dataset.CSV_PATH, chunksize=500_000, seed=0):
+    # Bootstrap baris sumber lalu beri noise log-normal pada nilai uang dan acak tanggal dalam tahun
+    # yang sama, sehingga distribusi dan kombinasi kategori tetap mirip data asli
+    asli = pd.read_csv(sumber)
+    tanggal = pd.to_datetime(asli['Date Recorded'], format=praproses.FORMAT_TANGGAL)
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    ditulis = 0
+    while ditulis < n:
+        k = min(chunksize, n - ditulis)
+        chunk = asli.iloc[rng.integers(0, len(asli), k)].reset_index(drop=True)
+        noise = rng.lognormal(0, 0.05, k)
+        chunk['Assessed Value'] = np.round(chunk['Assessed Value'] * noise).astype(np.int64)
+        chunk['Sale Amount'] = np.round(chunk['Sale Amount'] * rng.lognormal(0, 0.05, k))
+        chunk['Sales Ratio'] = chunk['Assessed Value'] / chunk['Sale Amount']
+        tahun = tanggal.dt.year.to_numpy()[rng.integers(0, len(asli), k)]
+        hari = rng.integers(0, 365, k)
+        baru = pd.to_datetime(tahun.astype(str), format='%Y') + pd.to_timedelta(hari, unit='D')
+        chunk['Date Recorded'] = baru.strftime(praproses.FORMAT_TANGGAL)
+        chunk['Serial Number'] = np.arange(ditulis, ditulis + k)
+        chunk.to_csv(path, mode='w' if ditulis == 0 else 'a', header=ditulis == 0, index=False)
+        ditulis += k
+    return path
+
+
+def data_sintetis(n):
+    path = os.path.join(BENCH_DIR, f'synth_{n}.csv')
+    if not os.path.exists(path):
+        sintesis(n, path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Pengukuran
+# ---------------------------------------------------------------------------
+
+def ukur(fungsi, repeat=5, warmup=1):
+    for _ in range(warmup):
+        fungsi()
+    durasi = []
+    for _ in range(repeat):
+        mulai = time.perf_counter()
+        fungsi()
+        durasi.append(time.perf_counter() - mulai)
+    return {'median_s': statistics.median(durasi), 'min_s': min(durasi), 'repeat': repeat}
+
+
+def _filter(data, year_range, property_types):
+    # Sama dengan langkah filter sidebar di eda.tampilkan_eda (indeks posisi di DatasetBersama)
+    return data.ambil(data.indeks(year_range, property_types))
+
+
+def jalankan(ukuran=UKURAN, repeat=5, model_path=MODEL_PATH, log=sys.stderr):
+    import joblib
+    import penjelasan
+
+    model = joblib.load(model_path)
+    hasil = {}
+
+    def catat(nama, fungsi, repeat=repeat, warmup=1):
+        hasil[nama] = ukur(fungsi, repeat, warmup)
+        print(f"{nama:<40} {hasil[nama]['median_s'] * 1000:>10.2f} ms", file=log)
+
+    for n in ukuran:
+        csv_path = data_sintetis(n)
+        k = f'n={n}'
+        # Cold load (parse CSV + tulis cache) dan warm load (baca Parquet)
+        catat(f'{k}/load_data_cold', lambda: dataset.build_cache(csv_path), repeat=max(1, repeat // 2), warmup=0)
+        catat(f'{k}/load_data', lambda: dataset.DatasetBersama(dataset.load_tabel(dataset.KOLOM_EDA, csv_path)))
+
+        # Dataset bersama seperti di halaman EDA: Sales Ratio sudah dihitung saat dimuat
+        data = dataset.DatasetBersama(dataset.load_tabel(dataset.KOLOM_EDA, csv_path))
+        df = data.df
+        tipe = list(df['Property Type'].cat.categories[:4])
+        year_range = (int(df['Year'].min()) + 1, int(df['Year'].max()))
+        catat(f'{k}/filter', lambda: _filter(data, year_range, tipe))
+        filtered = _filter(data, year_range, tipe)
+
+        catat(f'{k}/cube_build', lambda: agregasi.Cube.dari_dataframe(df))
+        cube = agregasi.Cube.dari_dataframe(df)
+        catat(f'{k}/tab1_histogram', lambda: grafik.histogram_figure(filtered, 'Sale Amount', 'Property Type'))
+        catat(f'{k}/tab1_scatter', lambda: grafik.scatter_figure(
+            filtered, 'Assessed Value', 'Sale Amount', 'Property Type', cube.trendline(year_range, tipe)))
+        catat(f'{k}/tab2_yearly', lambda: cube.yearly(year_range, tipe))
+        catat(f'{k}/tab2_box', lambda: grafik.box_figure(filtered, 'Year', 'Sale Amount', 'Property Type'))
+        catat(f'{k}/tab3_per_type', lambda: cube.per_type(year_range, tipe))
+        catat(f'{k}/tab3_sales_ratio_box', lambda: grafik.box_figure(filtered, 'Property Type', 'Sales Ratio'))
+
+    # Prediksi dan SHAP tidak bergantung pada ukuran dataset
+    fitur = siapkan_fitur(pd.read_csv(dataset.CSV_PATH, nrows=10_000))[FITUR]
+    satu = fitur.iloc[[0]]
+    catat('predict_single', lambda: model.predict(pd.DataFrame([satu.iloc[0].to_dict()])), repeat=50)
+    catat('predict_batch_10k', lambda: model.predict(fitur))
+    catat('shap_single', lambda: penjelasan.jelaskan(model, satu), repeat=20)
+    catat('shap_batch_10k', lambda: penjelasan.kontribusi_frame(model, fitur), repeat=2)
+    return hasil
+
+
+def simpan(hasil, path):
+    laporan = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        },
+        'results': hasil,
+    }
+    with open(path, 'w') as f:
+        json.dump(laporan, f, indent=2)
+    return path
+
+
+def bandingkan(lama_path, baru_path, threshold=THRESHOLD):
+    # Tandai benchmark yang median-nya naik lebih dari threshold
+    with open(lama_path) as f:
+        lama = json.load(f)['results']
+    with open(baru_path) as f:
+        baru = json.load(f)['results']
+
+    regresi = []
+    for nama in sorted(set(lama) & set(baru)):
+        a, b = lama[nama]['median_s'], baru[nama]['median_s']
+        rasio = b / a if a else float('inf')
+        tanda = 'REGRESI' if rasio > 1 + threshold else ''
+        print(f"{nama:<40} {a * 1000:>10.2f} ms -> {b * 1000:>10.2f} ms  x{rasio:5.2f} {tanda}")
+        if tanda:
+            regresi.append(nama)
+    for nama in sorted(set(lama) ^ set(baru)):
+        print(f"{nama:<40} hanya ada di {'lama' if nama in lama else 'baru'}")
+    return regresi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hot path data, EDA, dan prediksi")
+    sub = parser.add_subparsers(dest='perintah', required=True)
+
+    run = sub.add_parser('run', help="Jalankan benchmark dan simpan hasil JSON")
+    run.add_argument('--output', default='benchmark.json')
+    run.add_argument('--sizes', type=int, nargs='*', default=UKURAN)
+    run.add_argument('--repeat', type=int, default=5)
+
+    gen = sub.add_parser('generate', help="Buat dataset sintetis")
+    gen.add_argument('--sizes', type=int, nargs='*', default=UKURAN)
+
+    cmp = sub.add_parser('compare', help="Bandingkan dua hasil benchmark")
+    cmp.add_argument('lama')
+    cmp.add_argument('baru')
+    cmp.add_argument('--threshold', type=float, default=THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.perintah == 'run':
+        print(simpan(jalankan(args.sizes, args.repeat), args.output))
+    elif args.perintah == 'generate':
+        for n in args.sizes:
+            print(data_sintetis(n))
+    else:
+        regresi = bandingkan(args.lama, args.baru, args.threshold)
+        if regresi:
+            raise SystemExit(f"{len(regresi)} benchmark mengalami regresi")
+
+
+if __name__ == '__main__':
+    main()
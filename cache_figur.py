@@ -0,0 +1,103 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Anggaran total byte figure yang disimpan (JSON Plotly + PNG matplotlib), per proses
+BUDGET_BYTES = int(float(os.environ.get('FIGURE_CACHE_MB', 64)) * 2**20)
+
+
+def kunci(*bagian):
+    # Hash kanonik dari state filter/input: urutan key dict dan tipe numerik tidak berpengaruh
+    teks = json.dumps(bagian, sort_keys=True, default=_kanonik, separators=(',', ':'))
+    return hashlib.sha1(teks.encode()).hexdigest()
+
+
+def _kanonik(nilai):
+    if hasattr(nilai, 'tolist'):
+        return nilai.tolist()
+    if isinstance(nilai, (set, frozenset)):
+        return sorted(nilai, key=str)
+    return str(nilai)
+
+
+class FigureCache:
+    # LRU berdasarkan byte, bukan jumlah entri: figure besar (scatter) dan kecil (bar) berbagi anggaran
+
+    def __init__(self, budget_bytes=BUDGET_BYTES):
+        self.budget = budget_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            nilai = self._data.get(key)
+            if nilai is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return nilai
+
+    def put(self, key, nilai):
+        if len(nilai) > self.budget:
+            return
+        with self._lock:
+            lama = self._data.pop(key, None)
+            if lama is not None:
+                self.bytes -= len(lama)
+            self._data[key] = nilai
+            self.bytes += len(nilai)
+            while self.bytes > self.budget:
+                _, dibuang = self._data.popitem(last=False)
+                self.bytes -= len(dibuang)
+                self.evictions += 1
+
+    def statistik(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'entries': len(self._data), 'bytes': self.bytes, 'budget': self.budget,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+CACHE = FigureCache()
+
+
+def plotly(key, buat, cache=CACHE):
+    # Figure Plotly disimpan sebagai JSON; saat hit dibangun ulang dari JSON tanpa agregasi ulang
+    import plotly.graph_objects as go
+
+    data = cache.get(key)
+    if data is not None:
+        return go.Figure(json.loads(data), skip_invalid=True)
+    fig = buat()
+    cache.put(key, fig.to_json().encode())
+    return fig
+
+
+def png(key, buat, dpi=100, cache=CACHE):
+    # Figure matplotlib dirender sekali ke PNG lalu selalu ditutup (plt.close) agar tidak bocor
+    import matplotlib.pyplot as plt
+
+    data = cache.get(key)
+    if data is not None:
+        return data
+    fig = buat()
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    data = buffer.getvalue()
+    cache.put(key, data)
+    return data
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import praproses
+from instrumen import span
+from praproses import MODEL_PATH
+
+CSV_PATH = 'real_estate_sample_30k.csv'
+CACHE_DIR = 'cache'
+# Mode streaming di EDA hanya boleh membuka file transaksi di direktori ini (bukan path bebas dari pengunjung)
+DATA_DIR = os.environ.get('DATA_DIR', os.path.dirname(CSV_PATH) or '.')
+
+# Kolom yang benar-benar dipakai; kolom teks bebas (Address, Remarks, ...) tidak dibaca
+KOLOM_SUMBER = ['Date Recorded', 'Assessed Value', 'Sale Amount', 'Sales Ratio',
+                'Property Type', 'Residential Type']
+KOLOM_EDA = ['Assessed Value', 'Sale Amount', 'Sales Ratio', 'Property Type',
+             'Residential Type', 'Year']
+# Kolom lokasi ikut disimpan di cache untuk indeks spasial (lihat spasial.py)
+KOLOM_LOKASI_SUMBER = ['Town', 'Location']
+KOLOM_LOKASI = ['Date Recorded', 'Town', 'Longitude', 'Latitude']
+_META_SUMBER = b'source_signature'
+# Naikkan jika isi cache berubah supaya cache lama dibangun ulang
+CACHE_VERSI = 3
+
+
+def cache_path(csv_path=CSV_PATH):
+    nama = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, f'{nama}.parquet')
+
+
+def file_transaksi(directory=DATA_DIR):
+    # Daftar file .csv/.parquet langsung di dalam DATA_DIR (tanpa subdirektori)
+    try:
+        nama = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    return [os.path.normpath(os.path.join(directory, n)) for n in nama
+            if n.lower().endswith(('.csv', '.parquet')) and os.path.isfile(os.path.join(directory, n))]
+
+
+def signature(csv_path):
+    # Cache dianggap basi jika ukuran atau waktu modifikasi CSV berubah
+    info = os.stat(csv_path)
+    return f'{info.st_size}:{info.st_mtime_ns}'
+
+
+def _penanda(csv_path):
+    # Konfigurasi praproses model ikut menjadi kunci: model baru dengan nilai pengisi lain membangun ulang cache
+    return f'{signature(csv_path)}|v{CACHE_VERSI}|{praproses.sidik(praproses.muat(MODEL_PATH))}'.encode()
+
+
+def parse_location(location):
+    # 'POINT (lon lat)' -> dua kolom float, tanpa regex per baris; nilai kosong/rusak menjadi NaN
+    koordinat = location.astype('string').str.slice(7, -1).str.partition(' ')
+    lon = pd.to_numeric(koordinat[0], errors='coerce')
+    lat = pd.to_numeric(koordinat[2], errors='coerce')
+    return lon.astype('float64'), lat.astype('float64')
+
+
+def bersihkan(df, konfig=None):
+    # Praproses bersama (praproses.py) dengan nilai pengisi milik model, menghasilkan dtype ringkas.
+    # Nilai pengisi tetap, jadi hasil per chunk sama dengan hasil seluruh file sekaligus
+    hasil, tanggal = praproses.bersihkan(df, konfig or praproses.muat(MODEL_PATH))
+    if 'Location' in df.columns:
+        hasil['Date Recorded'] = tanggal
+        hasil['Longitude'], hasil['Latitude'] = parse_location(df['Location'])
+    if 'Town' in df.columns:
+        hasil['Town'] = df['Town'].astype('category')
+    hasil = hasil.dropna(subset=['Year'])
+    return hasil.astype({'Year': 'int16'})[[k for k in KOLOM_EDA + KOLOM_LOKASI if k in hasil.columns]]
+
+
+def build_cache(csv_path=CSV_PATH):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with span('csv: read'):
+        df = pd.read_csv(csv_path, usecols=KOLOM_SUMBER + KOLOM_LOKASI_SUMBER)
+    with span('csv: preprocessing'):
+        df = bersihkan(df)
+    tabel = pa.Table.from_pandas(df, preserve_index=False)
+    tabel = tabel.replace_schema_metadata({
+        **(tabel.schema.metadata or {}),
+        _META_SUMBER: _penanda(csv_path),
+    })
+
+    path = cache_path(csv_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    pq.write_table(tabel, tmp, compression='zstd')
+    os.replace(tmp, path)
+    return path
+
+
+def cache_valid(csv_path=CSV_PATH):
+    import pyarrow.parquet as pq
+
+    path = cache_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(_META_SUMBER) == _penanda(csv_path)
+
+
+def ingest_dir(csv_path=CSV_PATH):
+    nama = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, 'ingest', nama)
+
+
+def baca_state(csv_path=CSV_PATH):
+    # State ingestion (watermark, part Parquet tambahan); diabaikan jika CSV dasarnya sudah berganti
+    path = os.path.join(ingest_dir(csv_path), 'state.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return state if state['base_signature'] == signature(csv_path) else None
+
+
+def versi_data(csv_path=CSV_PATH):
+    # Kunci cache untuk data bersih: CSV dasar + jumlah batch yang sudah di-ingest
+    state = baca_state(csv_path)
+    return signature(csv_path) + (f"+{state['versi']}" if state else '')
+
+
+def load_tabel(columns=KOLOM_EDA, csv_path=CSV_PATH):
+    # Baca hanya kolom yang diminta dari cache Parquet; bangun ulang jika CSV berubah.
+    # Baris hasil ingestion (lihat ingesti.py) disimpan sebagai part terpisah dan ikut dibaca
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not cache_valid(csv_path):
+        build_cache(csv_path)
+    tabel = pq.read_table(cache_path(csv_path), columns=list(columns))
+    state = baca_state(csv_path)
+    if state and state['parts']:
+        parts = [pq.read_table(os.path.join(ingest_dir(csv_path), p), columns=list(columns))
+                 for p in state['parts']]
+        tabel = pa.concat_tables([tabel, *parts], promote_options='permissive')
+    return tabel
+
+
+def load_dataset(columns=KOLOM_EDA, csv_path=CSV_PATH):
+    return load_tabel(columns, csv_path).to_pandas()
+
+
+class DatasetBersama:
+    # Satu dataset read-only per proses untuk semua sesi (dipegang st.cache_resource, bukan
+    # st.cache_data yang memberi salinan ke tiap pemanggil). Kolom numerik adalah view langsung
+    # ke buffer Arrow dan semua array dikunci read-only, jadi mutasi tidak sengaja langsung gagal.
+
+    def __init__(self, tabel):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        # Kolom turunan dihitung sekali di sini, bukan per rerun di halaman
+        if 'Sales Ratio' in tabel.column_names:
+            rasio = pc.divide(pc.cast(tabel['Assessed Value'], pa.float64()),
+                              pc.cast(tabel['Sale Amount'], pa.float64()))
+            rasio = pc.if_else(pc.is_finite(rasio), rasio, None)
+            tabel = tabel.set_column(tabel.column_names.index('Sales Ratio'), 'Sales Ratio',
+                                     pc.cast(rasio, pa.float32()))
+        self.tabel = tabel.combine_chunks()
+        self.df = self.tabel.to_pandas(split_blocks=True)
+        for kolom in self.df.columns:
+            nilai = self.df[kolom].array
+            arr = nilai.codes if isinstance(nilai, pd.Categorical) else np.asarray(nilai)
+            arr.flags.writeable = False
+
+        self._year = self.df['Year'].to_numpy() if 'Year' in self.df else None
+        self._tipe = self.df['Property Type'].cat.codes.to_numpy() if 'Property Type' in self.df else None
+
+    def __len__(self):
+        return len(self.df)
+
+    def indeks(self, year_range=None, types=None):
+        # Posisi baris yang lolos filter (array int), tanpa menyalin kolom apa pun
+        mask = np.ones(len(self.df), dtype=bool)
+        if year_range is not None and self._year is not None:
+            mask &= (self._year >= year_range[0]) & (self._year <= year_range[1])
+        if types is not None and self._tipe is not None:
+            kategori = self.df['Property Type'].cat.categories
+            mask &= np.isin(self._tipe, kategori.get_indexer(list(types)))
+        return np.flatnonzero(mask)
+
+    def ambil(self, idx, columns=None):
+        # Frame hasil filter untuk satu rerun; sumbernya tetap tidak berubah
+        df = self.df if columns is None else self.df[list(columns)]
+        return df.iloc[idx] if len(idx) < len(df) else df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bangun cache Parquet dari CSV real estate")
+    parser.add_argument('csv', nargs='?', default=CSV_PATH)
+    args = parser.parse_args()
+    print(build_cache(args.csv))
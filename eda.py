@@ -1,55 +1,134 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
+import dataset
+import grafik
+import streaming
+import spasial
+import ingesti
+import cache_figur
+from instrumen import span
 
-def tampilkan_eda():
-    st.set_page_config(
-        page_title="EDA - Real Estate",
-        page_icon="📊",
-        layout="wide"
-    )
+BAGIAN = ["Distribusi Harga", "Tren Tahun", "Analisis Properti", "Peta"]
+
+
+def pilih_bagian(options, key):
+    # st.tabs selalu menjalankan isi semua tab; dengan pilihan ini hanya bagian yang dilihat yang dihitung
+    return st.radio("Bagian", options=options, horizontal=True, key=key,
+                    label_visibility='collapsed')
+
+
+@st.cache_resource
+def load_cube_streaming(path, source_signature):
+    # Cube dari file besar dibangun per chunk; memori tidak bergantung pada ukuran file
+    return streaming.muat_cube(path)
+
+
+def tampilkan_streaming(path):
+    try:
+        cube = load_cube_streaming(path, dataset.signature(path))
+    except FileNotFoundError:
+        st.error(f"File '{path}' tidak ditemukan")
+        return
+
+    st.caption(f"Mode streaming: {int(cube.rows.sum()):,} transaksi dari `{path}`, "
+               "semua grafik dihitung dari agregat per (Year, Property Type)")
+
+    # Filter sidebar
+    st.sidebar.header("Filter Data")
+    year_min, year_max = int(cube.years.min()), int(cube.years.max())
+    year_range = st.sidebar.slider("Rentang Tahun", min_value=year_min, max_value=year_max,
+                                   value=(year_min, year_max))
+    property_types = st.sidebar.multiselect("Tipe Properti", options=cube.types, default=cube.types)
+
+    bagian = pilih_bagian(BAGIAN[:3], 'eda_bagian_streaming')
+
+    if bagian == BAGIAN[0]:
+        st.header("Distribusi Harga")
+        edges, groups, counts = cube.histogram('Sale Amount', year_range, property_types)
+        fig = grafik.histogram_figure_dari_sketch(edges, groups, counts, 'Sale Amount',
+                                                  title='Distribusi Harga Jual (skala log)')
+        st.plotly_chart(fig, use_container_width=True)
 
+    elif bagian == BAGIAN[1]:
+        st.header("Tren Harga Tahunan")
+        yearly_data = cube.yearly(year_range, property_types)
+        fig = px.line(yearly_data, x='Year', y=['Sale Amount', 'Assessed Value'],
+                      title='Tren Harga Rata-Rata Tahunan',
+                      labels={'value': 'Harga ($)', 'variable': 'Metrik'})
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("Distribusi Harga per Tahun")
+        stats = cube.box_stats('Sale Amount', 'Year', year_range, property_types)
+        fig = grafik.box_figure_dari_stats(stats, None, 'Year', 'Sale Amount',
+                                           title='Distribusi Harga per Tahun')
+        st.plotly_chart(fig, use_container_width=True)
+
+    else:
+        st.header("Analisis Berdasarkan Tipe Properti")
+        prop_stats = cube.per_type(year_range, property_types)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.dataframe(prop_stats.sort_values('Mean Price', ascending=False))
+        with col2:
+            fig = px.bar(prop_stats, x='Property Type', y='Mean Price',
+                         title='Harga Rata-Rata per Tipe Properti')
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("Analisis Sales Ratio")
+        stats = cube.box_stats('Sales Ratio', 'Property Type', year_range, property_types)
+        fig = grafik.box_figure_dari_stats(stats, None, 'Property Type', 'Sales Ratio',
+                                           title='Distribusi Sales Ratio per Tipe Properti')
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def tampilkan_eda():
     # Judul
     st.title("📊 Exploratory Data Analysis")
     st.markdown("""
     Jelajahi distribusi dan pola dalam dataset real estate.
     """)
 
+    # Mode streaming untuk file transaksi yang lebih besar dari memori
+    if st.sidebar.checkbox("Mode streaming (file besar)"):
+        files = dataset.file_transaksi()
+        if not files:
+            st.error(f"Tidak ada file .csv/.parquet di direktori data '{dataset.DATA_DIR}'")
+            return
+        default = files.index(dataset.CSV_PATH) if dataset.CSV_PATH in files else 0
+        path = st.sidebar.selectbox("File transaksi (.csv / .parquet)", options=files, index=default)
+        tampilkan_streaming(path)
+        return
+
     # Load data
-    @st.cache_data
-    def load_data():
-        df = pd.read_csv('real_estate_sample_30k.csv')
-        
-        # Data preprocessing (sesuaikan dengan preprocessing yang Anda lakukan di notebook)
-        df['Date Recorded'] = pd.to_datetime(df['Date Recorded'])
-        df['Year'] = df['Date Recorded'].dt.year
-        
-        # Handle missing values
-        df['Property Type'] = df['Property Type'].fillna(df[~df['Property Type'].isin(['-1','Unknown'])]['Property Type'].mode()[0])
-        df['Residential Type'] = df['Residential Type'].fillna(df[~df['Residential Type'].isin(['-1','Unknown'])]['Residential Type'].mode()[0])
-        
-        # Convert 'Sale Amount' to numeric
-        df['Sale Amount'] = pd.to_numeric(df['Sale Amount'].astype(str).str.replace(',', ''), errors='coerce')
-        
-        # Drop unnecessary columns
-        dropped_columns = ['Serial Number', 'List Year', 'Date Recorded', 'Town', 'Address', 
-                          'Non Use Code', 'Assessor Remarks', 'OPM remarks', 'Location']
-        df.drop(dropped_columns, axis=1, inplace=True)
-        
-        # Group property types
-        def group_family_only(x):
-            if isinstance(x, str) and 'Family' in x:
-                return 'Family'
-            return x if pd.notna(x) else 'Unknown'
-        
-        df['Property Type'] = df['Property Type'].apply(group_family_only)
-        
-        return df
+    @st.cache_resource
+    def load_data(source_signature):
+        # Satu dataset read-only (Arrow) dipakai bersama semua sesi; st.cache_data akan
+        # mengembalikan salinan hasil unpickle ke setiap pemanggil
+        return dataset.DatasetBersama(dataset.load_tabel(dataset.KOLOM_EDA))
 
-    df = load_data()
+    # Cube agregat (Year x Property Type) dibangun sekali, dipakai semua kombinasi filter.
+    # Setelah ingestion, cube yang diperbarui inkremental langsung dibaca dari cache/ingest
+    @st.cache_resource
+    def load_cube(source_signature, _df):
+        return ingesti.muat_cube(_df)
+
+    # Agregasi hexbin dihitung di server per kombinasi filter; browser hanya menerima sel hex
+    @st.cache_data(max_entries=32)
+    def load_hexbin(source_signature, year_range, property_types, ukuran_km):
+        indeks = spasial.muat_indeks()
+        mask = (indeks.data['Year'].between(*year_range) &
+                indeks.data['Property Type'].isin(property_types)).to_numpy()
+        agg = indeks.hexbin(ukuran_km, mask=mask)
+        lon, lat = indeks.hex_polygon(agg, ukuran_km)
+        return agg, lon, lat
+
+    # Berubah jika CSV dasar diganti atau ada batch baru dari ingesti.py
+    source_signature = dataset.versi_data(dataset.CSV_PATH)
+    with span('eda: load_data'):
+        data = load_data(source_signature)
+        df = data.df
+    with span('eda: load_cube'):
+        cube = load_cube(source_signature, df)
 
     # Show preview
     st.subheader("Preview Data")
@@ -82,130 +161,173 @@ def tampilkan_eda():
         st.sidebar.warning("Kolom 'Property Type' tidak ditemukan dalam data")
         property_types = []
 
-    # Filter data
-    if 'Year' in df.columns and 'Property Type' in df.columns:
-        filtered_df = df[
-            (df['Year'].between(year_range[0], year_range[1])) &
-            (df['Property Type'].isin(property_types))
-        ]
-    else:
-        filtered_df = df.copy()
+    # Filter data: baris hasil filter baru diambil saat figure belum ada di cache, dan hanya
+    # oleh bagian yang sedang ditampilkan
+    terfilter = []
 
-    # Tabs untuk berbagai visualisasi
-    tab1, tab2, tab3 = st.tabs(["Distribusi Harga", "Tren Tahun", "Analisis Properti"])
+    def filtered():
+        if not terfilter:
+            if 'Year' in df.columns and 'Property Type' in df.columns:
+                with span('eda: filter'):
+                    terfilter.append(data.ambil(data.indeks(year_range, property_types)))
+            else:
+                terfilter.append(df)
+        return terfilter[0]
 
-    with tab1:
+    # Figure yang sudah pernah dibuat untuk state filter yang sama diambil dari cache (JSON)
+    def kunci_figur(*nama):
+        return cache_figur.kunci('eda', source_signature, year_range, sorted(property_types), *nama)
+
+    # Bagian visualisasi; masing-masing hanya dijalankan jika dipilih
+    def bagian_distribusi():
         st.header("Distribusi Harga")
         col1, col2 = st.columns(2)
         
         with col1:
-            if 'Sale Amount' in filtered_df.columns:
+            if 'Sale Amount' in df.columns:
                 st.subheader("Harga Jual")
-                fig = px.histogram(
-                    filtered_df, 
+                # Bin dihitung di server, figure hanya berisi jumlah per bin
+                fig = cache_figur.plotly(kunci_figur('histogram'), lambda: grafik.histogram_figure(
+                    filtered(),
                     x='Sale Amount',
                     nbins=50,
-                    color='Property Type' if 'Property Type' in filtered_df.columns else None,
+                    color='Property Type' if 'Property Type' in df.columns else None,
                     title='Distribusi Harga Jual'
-                )
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Kolom 'Sale Amount' tidak ditemukan dalam data")
         
         with col2:
-            if 'Assessed Value' in filtered_df.columns and 'Sale Amount' in filtered_df.columns:
+            if 'Assessed Value' in df.columns and 'Sale Amount' in df.columns:
                 st.subheader("Nilai Taksiran vs Harga Jual")
-                fig = px.scatter(
-                    filtered_df,
-                    x='Assessed Value',
-                    y='Sale Amount',
-                    color='Property Type' if 'Property Type' in filtered_df.columns else None,
-                    trendline="ols",
-                    title='Korelasi Nilai Taksiran dan Harga Jual'
+                scatter_mode = st.radio(
+                    "Mode tampilan",
+                    [grafik.MODE_AUTO, grafik.MODE_DENSITY, grafik.MODE_SAMPLE],
+                    horizontal=True
                 )
+                # Koefisien trendline diambil dari cube, tidak perlu fit OLS ulang tiap rerun
+                def buat_scatter():
+                    with span('agregasi: trendline'):
+                        coef = cube.trendline(year_range, property_types)
+                    return grafik.scatter_figure(
+                        filtered(),
+                        x='Assessed Value',
+                        y='Sale Amount',
+                        color='Property Type',
+                        coef=coef,
+                        mode=scatter_mode,
+                        title='Korelasi Nilai Taksiran dan Harga Jual'
+                    )
+                fig = cache_figur.plotly(kunci_figur('scatter', scatter_mode), buat_scatter)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Kolom 'Assessed Value' atau 'Sale Amount' tidak ditemukan dalam data")
 
-    with tab2:
+    def bagian_tren():
         st.header("Tren Harga Tahunan")
         
-        if 'Year' in filtered_df.columns and 'Sale Amount' in filtered_df.columns:
-            # Tren rata-rata harga per tahun
-            yearly_data = filtered_df.groupby('Year').agg({
-                'Sale Amount': 'mean',
-                'Assessed Value': 'mean' if 'Assessed Value' in filtered_df.columns else None
-            }).reset_index()
-            
-            fig = px.line(
-                yearly_data,
-                x='Year',
-                y=['Sale Amount'] + (['Assessed Value'] if 'Assessed Value' in yearly_data.columns else []),
-                title='Tren Harga Rata-Rata Tahunan',
-                labels={'value': 'Harga ($)', 'variable': 'Metrik'}
-            )
+        if 'Year' in df.columns and 'Sale Amount' in df.columns:
+            # Tren rata-rata harga per tahun (dari cube, tanpa groupby ulang)
+            def buat_yearly():
+                with span('agregasi: yearly'):
+                    yearly_data = cube.yearly(year_range, property_types)
+                with span('plotly: yearly line'):
+                    return px.line(
+                        yearly_data,
+                        x='Year',
+                        y=['Sale Amount'] + (['Assessed Value'] if 'Assessed Value' in yearly_data.columns else []),
+                        title='Tren Harga Rata-Rata Tahunan',
+                        labels={'value': 'Harga ($)', 'variable': 'Metrik'}
+                    )
+            fig = cache_figur.plotly(kunci_figur('yearly'), buat_yearly)
             st.plotly_chart(fig, use_container_width=True)
             
             # Boxplot per tahun
             st.subheader("Distribusi Harga per Tahun")
-            fig = px.box(
-                filtered_df,
+            fig = cache_figur.plotly(kunci_figur('box year'), lambda: grafik.box_figure(
+                filtered(),
                 x='Year',
                 y='Sale Amount',
-                color='Property Type' if 'Property Type' in filtered_df.columns else None,
+                color='Property Type' if 'Property Type' in df.columns else None,
                 title='Distribusi Harga per Tahun'
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.warning("Kolom 'Year' atau 'Sale Amount' tidak ditemukan dalam data")
 
-    with tab3:
+    def bagian_properti():
         st.header("Analisis Berdasarkan Tipe Properti")
         
-        if 'Property Type' in filtered_df.columns:
+        if 'Property Type' in df.columns:
             # Perbandingan properti
             st.subheader("Perbandingan Rata-Rata Harga")
-            prop_stats = filtered_df.groupby('Property Type').agg({
-                'Sale Amount': ['mean', 'median', 'count'] if 'Sale Amount' in filtered_df.columns else None
-            }).reset_index()
+            with span('agregasi: per_type'):
+                prop_stats = cube.per_type(year_range, property_types)
             
             if not prop_stats.empty:
-                prop_stats.columns = ['Property Type', 'Mean Price', 'Median Price', 'Count']
-                
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     st.dataframe(prop_stats.sort_values('Mean Price', ascending=False))
                 
                 with col2:
-                    fig = px.bar(
-                        prop_stats,
-                        x='Property Type',
-                        y='Mean Price',
-                        title='Harga Rata-Rata per Tipe Properti'
-                    )
+                    def buat_bar():
+                        with span('plotly: per_type bar'):
+                            return px.bar(
+                                prop_stats,
+                                x='Property Type',
+                                y='Mean Price',
+                                title='Harga Rata-Rata per Tipe Properti'
+                            )
+                    fig = cache_figur.plotly(kunci_figur('per_type bar'), buat_bar)
                     st.plotly_chart(fig, use_container_width=True)
             
             # Sales ratio analysis
-            if 'Assessed Value' in filtered_df.columns and 'Sale Amount' in filtered_df.columns:
+            if 'Assessed Value' in df.columns and 'Sale Amount' in df.columns:
                 st.subheader("Analisis Sales Ratio")
                 st.markdown("""
                 Sales Ratio = Assessed Value / Sale Amount  
                 Rasio ~1.0 berarti nilai taksiran mendekati harga jual.
                 """)
-                filtered_df['Sales Ratio'] = filtered_df['Assessed Value'] / filtered_df['Sale Amount']
-                fig = px.box(
-                    filtered_df,
+                # Kolom Sales Ratio sudah dihitung sekali saat dataset dimuat (DatasetBersama)
+                fig = cache_figur.plotly(kunci_figur('box sales ratio'), lambda: grafik.box_figure(
+                    filtered(),
                     x='Property Type',
                     y='Sales Ratio',
                     title='Distribusi Sales Ratio per Tipe Properti'
-                )
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Kolom 'Assessed Value' atau 'Sale Amount' tidak ditemukan untuk analisis Sales Ratio")
         else:
             st.warning("Kolom 'Property Type' tidak ditemukan dalam data")
 
+    # Peta harga (hexbin)
+    def bagian_peta():
+        st.header("Peta Harga per Wilayah")
+        col1, col2 = st.columns(2)
+        with col1:
+            ukuran_km = st.select_slider("Ukuran sel hex (km)", options=[0.5, 1.0, 2.0, 5.0, 10.0],
+                                         value=spasial.HEX_KM)
+        with col2:
+            nilai = st.radio("Warna", options=['Median', 'Mean', 'Count'], horizontal=True)
+        with span('agregasi: hexbin'):
+            agg, lon, lat = load_hexbin(source_signature, year_range, tuple(property_types), ukuran_km)
+        if agg.empty:
+            st.info("Tidak ada transaksi berkoordinat untuk filter ini")
+        else:
+            st.caption(f"{int(agg['Count'].sum()):,} transaksi berkoordinat dalam {len(agg):,} sel")
+            fig = cache_figur.plotly(kunci_figur('hexbin', ukuran_km, nilai), lambda: grafik.hexbin_map_figure(
+                agg, lon, lat, nilai, title='Harga Jual per Sel Hex'))
+            st.plotly_chart(fig, use_container_width=True)
+
+    bagian = pilih_bagian(BAGIAN, 'eda_bagian')
+    with span(f'eda: {bagian}'):
+        {BAGIAN[0]: bagian_distribusi, BAGIAN[1]: bagian_tren,
+         BAGIAN[2]: bagian_properti, BAGIAN[3]: bagian_peta}[bagian]()
+
+
 # Panggil fungsi utama
 if __name__ == '__main__':
     tampilkan_eda()
\ No newline at end of file
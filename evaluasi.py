@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+import dataset
+import latih
+import praproses
+from artefak import hash_file
+from praproses import MODEL_PATH
+
+EVAL_DIR = os.path.join(dataset.CACHE_DIR, 'evaluasi')
+K_FOLD = 5
+MODE_KFOLD = 'kfold'
+MODE_WAKTU = 'waktu'
+
+_data = None
+
+
+def kunci_data(csv_path=dataset.CSV_PATH):
+    # Isi CSV (bukan hanya mtime) ditambah versi ingestion
+    state = dataset.baca_state(csv_path)
+    return hash_file(csv_path)[:16] + (f"+{state['versi']}" if state else '')
+
+
+def hasil_path(model_hash, data_key, mode=MODE_KFOLD, directory=EVAL_DIR):
+    return os.path.join(directory, f'{model_hash[:16]}_{data_key}_{mode}.json')
+
+
+def lipatan(X, mode=MODE_KFOLD, k=K_FOLD, seed=latih.RANDOM_STATE):
+    # kfold: K lipatan acak; waktu: latih pada tahun-tahun sebelumnya, uji pada satu tahun berikutnya
+    if mode == MODE_WAKTU:
+        tahun = X['Year'].to_numpy()
+        return [(np.flatnonzero(tahun < t), np.flatnonzero(tahun == t))
+                for t in np.unique(tahun)[1:]]
+    urutan = np.random.default_rng(seed).permutation(len(X))
+    bagian = np.array_split(urutan, k)
+    return [(np.concatenate(bagian[:i] + bagian[i + 1:]), bagian[i]) for i in range(k)]
+
+
+def _init_worker(data, model_path):
+    global _data
+    _data = (*data, joblib.load(model_path))
+
+
+def _nilai_lipatan(idx_train, idx_test):
+    # Konfigurasi pipeline model disalin (clone) lalu dilatih ulang hanya pada data train lipatan ini
+    from sklearn.base import clone
+
+    X, y, model = _data
+    # Model hasil latih.py bisa menyimpan early_stopping_rounds (butuh eval_set); tiap lipatan dilatih
+    # dengan jumlah tree yang sama seperti model yang dievaluasi, tanpa early stopping
+    params = {'regressor__n_jobs': 1, 'regressor__early_stopping_rounds': None}
+    best = model.named_steps['regressor'].get_booster().attr('best_iteration')
+    if best is not None:
+        params['regressor__n_estimators'] = int(best) + 1
+    estimator = clone(model).set_params(**params)
+    estimator.fit(X.iloc[idx_train], y.iloc[idx_train])
+    return idx_test, estimator.predict(X.iloc[idx_test])
+
+
+def per_segmen(X, y, prediksi, kolom):
+    return {str(nilai): {**latih.metrik(y[mask], prediksi[mask]), 'n': int(mask.sum())}
+            for nilai in sorted(X[kolom].dropna().unique())
+            for mask in [(X[kolom] == nilai).to_numpy()]}
+
+
+def evaluasi(model_path=MODEL_PATH, csv_path=dataset.CSV_PATH, mode=MODE_KFOLD, k=K_FOLD,
+             workers=None, log=None):
+    # Praproses memakai konfigurasi yang disimpan bersama model, sama seperti saat serving
+    X, y = latih.muat_data(csv_path, praproses.muat(model_path))
+    folds = lipatan(X, mode, k)
+    prediksi = np.full(len(X), np.nan)
+    mulai = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or min(len(folds), os.cpu_count()),
+                             initializer=_init_worker, initargs=((X, y), model_path)) as pool:
+        for idx_test, pred in pool.map(_nilai_lipatan, *zip(*folds)):
+            prediksi[idx_test] = pred
+            if log is not None:
+                print(f"lipatan selesai ({len(idx_test):,} baris uji, "
+                      f"{time.perf_counter() - mulai:.1f} s)", file=log)
+
+    # Mode waktu: tahun pertama tidak pernah diuji
+    diuji = ~np.isnan(prediksi)
+    X, y, prediksi = X[diuji], y.to_numpy()[diuji], prediksi[diuji]
+    return {
+        'mode': mode,
+        'folds': len(folds),
+        'rows': int(diuji.sum()),
+        'overall': latih.metrik(y, prediksi),
+        'per_property_type': per_segmen(X, y, prediksi, 'Property Type'),
+        'per_year': per_segmen(X, y, prediksi, 'Year'),
+        'seconds': time.perf_counter() - mulai,
+    }
+
+
+def muat_hasil(model_hash, data_key, mode=MODE_KFOLD, directory=EVAL_DIR):
+    path = hasil_path(model_hash, data_key, mode, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def jalankan(model_path=MODEL_PATH, csv_path=dataset.CSV_PATH, mode=MODE_KFOLD, k=K_FOLD,
+             workers=None, directory=EVAL_DIR, log=None):
+    # Hasil disimpan per (hash model, hash data, mode); kombinasi yang sama tidak dievaluasi ulang
+    model_hash, data_key = hash_file(model_path), kunci_data(csv_path)
+    hasil = muat_hasil(model_hash, data_key, mode, directory)
+    if hasil is not None:
+        return hasil, True
+    hasil = {**evaluasi(model_path, csv_path, mode, k, workers, log),
+             'model_sha256': model_hash, 'data_key': data_key}
+    os.makedirs(directory, exist_ok=True)
+    path = hasil_path(model_hash, data_key, mode, directory)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(hasil, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return hasil, False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluasi held-out real_estate_model.pkl (K-fold / time split)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--csv', default=dataset.CSV_PATH)
+    parser.add_argument('--mode', choices=[MODE_KFOLD, MODE_WAKTU], default=MODE_KFOLD)
+    parser.add_argument('-k', type=int, default=K_FOLD)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    hasil, cached = jalankan(args.model, args.csv, args.mode, args.k, args.workers, log=sys.stderr)
+    m = hasil['overall']
+    print(f"{args.mode} ({hasil['folds']} lipatan, {hasil['rows']:,} baris{', cache' if cached else ''}): "
+          f"MAE {m['mae']:,.0f} | RMSE {m['rmse']:,.0f} | MAPE {m['mape']:.2f}%")
+    for tipe, mt in hasil['per_property_type'].items():
+        print(f"  {tipe:<15} n={mt['n']:>6,}  MAE {mt['mae']:>12,.0f}  RMSE {mt['rmse']:>12,.0f}  MAPE {mt['mape']:>8.2f}%")
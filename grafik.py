@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from agregasi import GAMMA as GAMMA_SKETCH
+from instrumen import span
+
+# Di atas batas ini titik mentah tidak lagi dikirim ke browser
+MAX_POINTS = 5000
+DENSITY_BINS = 120
+# Ekor distribusi harga sangat panjang; density dibatasi sampai kuantil ini
+DENSITY_QUANTILE = 0.995
+
+MODE_AUTO = 'Otomatis'
+MODE_POINTS = 'Semua titik'
+MODE_DENSITY = 'Density'
+MODE_SAMPLE = 'Sampel'
+
+
+def stratified_sample(df, group, n_max, seed=0):
+    # Sampel proporsional per grup, ukuran total <= n_max, setiap grup tetap terwakili
+    if len(df) <= n_max:
+        return df
+    codes, uniques = pd.factorize(df[group])
+    counts = np.bincount(codes)
+    kuota = np.maximum(1, np.floor(counts * n_max / len(df))).astype(np.int64)
+
+    rng = np.random.default_rng(seed)
+    urutan = np.lexsort((rng.random(len(df)), codes))
+    awal = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[urutan] = np.arange(len(df)) - np.repeat(awal, counts)
+    return df[rank < kuota[codes]]
+
+
+def tambah_trendline(fig, coef, x_max, colors=None):
+    # Gambar garis OLS dari koefisien yang sudah dihitung (dua titik per garis)
+    colors = colors or {}
+    for row in coef.itertuples(index=False):
+        tipe = row[0]
+        fig.add_trace(go.Scatter(
+            x=[0, x_max],
+            y=[row.intercept, row.intercept + row.slope * x_max],
+            mode='lines',
+            name=f'OLS {tipe}',
+            line=dict(color=colors.get(tipe), dash='dash'),
+        ))
+    return fig
+
+
+def scatter_density(df, x, y, bins=DENSITY_BINS, quantile=DENSITY_QUANTILE, title=None):
+    # Histogram 2D dihitung di server; ukuran payload hanya bins x bins
+    xv = df[x].to_numpy(dtype=np.float64)
+    yv = df[y].to_numpy(dtype=np.float64)
+    valid = np.isfinite(xv) & np.isfinite(yv)
+    xv, yv = xv[valid], yv[valid]
+    x_max = np.quantile(xv, quantile) if len(xv) else 1.0
+    y_max = np.quantile(yv, quantile) if len(yv) else 1.0
+    counts, x_edges, y_edges = np.histogram2d(xv, yv, bins=bins, range=[[0, x_max], [0, y_max]])
+
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.log10(np.where(counts > 0, counts, np.nan)).astype(np.float32).T,
+        customdata=counts.astype(np.int32).T,
+        hovertemplate=f'{x}: %{{x:,.0f}}<br>{y}: %{{y:,.0f}}<br>Jumlah: %{{customdata:,.0f}}<extra></extra>',
+        colorscale='Viridis',
+        colorbar=dict(title='log10(jumlah)'),
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y,
+                      xaxis_range=[0, x_max], yaxis_range=[0, y_max])
+    return fig, x_max
+
+
+def scatter_figure(df, x, y, color, coef, mode=MODE_AUTO, max_points=MAX_POINTS, title=None):
+    # Scatter dengan payload terbatas: titik mentah, density, atau sampel bertingkat
+    if mode == MODE_AUTO:
+        mode = MODE_POINTS if len(df) <= max_points else MODE_DENSITY
+    # Titik mentah tidak pernah lebih dari max_points; di atas itu diganti sampel bertingkat
+    if mode == MODE_POINTS and len(df) > max_points:
+        mode = MODE_SAMPLE
+
+    if mode == MODE_DENSITY:
+        with span('plotly: scatter density'):
+            fig, x_max = scatter_density(df, x, y, title=title)
+            return tambah_trendline(fig, coef, x_max)
+
+    if mode == MODE_SAMPLE:
+        with span('agregasi: scatter sample'):
+            df = stratified_sample(df, color, max_points)
+    with span('plotly: scatter'):
+        fig = px.scatter(df, x=x, y=y, color=color, title=title,
+                         category_orders={color: list(coef['Property Type'])})
+        colors = {trace.name: trace.marker.color for trace in fig.data}
+        x_max = float(df[x].max()) if len(df) else 0.0
+        return tambah_trendline(fig, coef, x_max, colors)
+
+
+# Histogram dan box plot: bin dan kuartil dihitung di server, browser hanya menerima ringkasan
+HIST_BINS = 50
+MAX_OUTLIERS = 200
+
+
+def histogram_stats(df, x, color=None, nbins=HIST_BINS):
+    # Jumlah per (grup, bin) dengan edge yang sama untuk semua grup
+    values = df[x].to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    values = values[valid]
+    if color is not None:
+        codes, groups = pd.factorize(df[color].to_numpy()[valid])
+    else:
+        codes, groups = np.zeros(len(values), dtype=np.int64), np.array([x])
+    lo, hi = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    edges = np.histogram_bin_edges(values, bins=nbins, range=(lo, hi if hi > lo else lo + 1))
+    idx = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, nbins - 1)
+    counts = np.bincount(codes * nbins + idx, minlength=len(groups) * nbins).reshape(len(groups), nbins)
+    return edges, list(groups), counts
+
+
+def histogram_figure(df, x, color=None, nbins=HIST_BINS, title=None):
+    with span('agregasi: histogram'):
+        edges, groups, counts = histogram_stats(df, x, color, nbins)
+    with span('plotly: histogram'):
+        centers = (edges[:-1] + edges[1:]) / 2
+        fig = go.Figure()
+        for i, grup in enumerate(groups):
+            fig.add_trace(go.Bar(x=centers, y=counts[i], width=np.diff(edges), name=str(grup),
+                                 marker_color=px.colors.qualitative.Plotly[i % 10]))
+        fig.update_layout(barmode='relative', bargap=0, title=title, xaxis_title=x, yaxis_title='count',
+                          legend_title_text=color, showlegend=color is not None)
+    return fig
+
+
+def _quantile_sorted(values, starts, counts, q):
+    # Kuantil interpolasi linear (sama seperti np.quantile) untuk tiap grup yang sudah terurut
+    pos = starts + (counts - 1) * q
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, starts + counts - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def box_stats(df, x, y, color=None, max_outliers=MAX_OUTLIERS, seed=0):
+    # Kuartil, whisker (1.5 IQR) dan sampel outlier terbatas per grup, semuanya vektor
+    kunci = [x] if color is None else [color, x]
+    values = df[y].to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    keys = df.loc[valid, kunci].reset_index(drop=True)
+    values = values[valid]
+    if len(values) == 0:
+        kosong = pd.DataFrame(columns=kunci + ['q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'n'])
+        return kosong, pd.DataFrame(columns=kunci + [y])
+
+    codes = keys.groupby(kunci, sort=True, observed=True).ngroup().to_numpy()
+    urutan = np.lexsort((values, codes))
+    codes, values = codes[urutan], values[urutan]
+    counts = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    q1 = _quantile_sorted(values, starts, counts, 0.25)
+    median = _quantile_sorted(values, starts, counts, 0.5)
+    q3 = _quantile_sorted(values, starts, counts, 0.75)
+    iqr = q3 - q1
+    inlier = (values >= (q1 - 1.5 * iqr)[codes]) & (values <= (q3 + 1.5 * iqr)[codes])
+    lowerfence = np.minimum.reduceat(np.where(inlier, values, np.inf), starts)
+    upperfence = np.maximum.reduceat(np.where(inlier, values, -np.inf), starts)
+
+    stats = keys.iloc[urutan[starts]].reset_index(drop=True)
+    stats['q1'], stats['median'], stats['q3'] = q1, median, q3
+    stats['lowerfence'], stats['upperfence'] = lowerfence, upperfence
+    stats['mean'] = np.bincount(codes, weights=values) / counts
+    stats['n'] = counts
+
+    # Outlier: maksimal max_outliers per grup, dipilih acak agar tetap representatif
+    out_codes, out_values = codes[~inlier], values[~inlier]
+    rank = np.random.default_rng(seed).permutation(len(out_codes))
+    rank_urut = np.lexsort((rank, out_codes))
+    n_out = np.bincount(out_codes, minlength=len(counts))
+    awal = np.concatenate([[0], np.cumsum(n_out)[:-1]])
+    posisi = np.empty(len(out_codes), dtype=np.int64)
+    posisi[rank_urut] = np.arange(len(out_codes)) - np.repeat(awal, n_out)
+    ambil = posisi < max_outliers
+    outliers = stats.loc[out_codes[ambil], kunci].reset_index(drop=True)
+    outliers[y] = out_values[ambil]
+    return stats, outliers
+
+
+def box_figure(df, x, y, color=None, title=None):
+    with span(f'agregasi: box {y}'):
+        stats, outliers = box_stats(df, x, y, color)
+    with span(f'plotly: box {y}'):
+        return box_figure_dari_stats(stats, outliers, x, y, color, title)
+
+
+def box_figure_dari_stats(stats, outliers, x, y, color=None, title=None):
+    # outliers boleh None (mis. statistik dari sketch cube yang tidak menyimpan baris)
+    if outliers is None:
+        outliers = pd.DataFrame(columns=list(stats.columns[:1 if color is None else 2]) + [y])
+    fig = go.Figure()
+    grup = [(None, stats, outliers)] if color is None else [
+        (nama, stats[stats[color] == nama], outliers[outliers[color] == nama])
+        for nama in stats[color].unique()
+    ]
+    for i, (nama, s, o) in enumerate(grup):
+        warna = px.colors.qualitative.Plotly[i % 10]
+        label = str(nama) if nama is not None else y
+        # Sampel outlier dikirim sebagai array 2D (satu list per box) bersama statistik prakomputasi
+        sampel = o.groupby(x, sort=False, observed=True)[y].agg(list).to_dict()
+        fig.add_trace(go.Box(
+            x=s[x], q1=s['q1'], median=s['median'], q3=s['q3'],
+            lowerfence=s['lowerfence'], upperfence=s['upperfence'], mean=s['mean'],
+            y=[sampel.get(k, []) for k in s[x]],
+            name=label, marker_color=warna, boxpoints='all', jitter=0, pointpos=0,
+        ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y,
+                      boxmode='group' if color is not None else 'overlay',
+                      showlegend=color is not None)
+    return fig
+
+
+def histogram_figure_dari_sketch(edges, groups, counts, x, gabung=10, title=None):
+    # Histogram dari bucket sketch (bin logaritmik); setiap `gabung` bucket disatukan menjadi satu bar
+    n_bin = -(-counts.shape[1] // gabung)
+    pad = n_bin * gabung - counts.shape[1]
+    counts = np.pad(counts, ((0, 0), (0, pad))).reshape(len(groups), n_bin, gabung).sum(axis=2)
+    edges = np.concatenate([edges, edges[-1] * GAMMA_SKETCH ** np.arange(1, pad + 1)])[::gabung]
+    fig = go.Figure()
+    for i, grup in enumerate(groups):
+        fig.add_trace(go.Bar(x=np.sqrt(edges[:-1] * edges[1:]), y=counts[i], width=np.diff(edges),
+                             name=str(grup), marker_color=px.colors.qualitative.Plotly[i % 10]))
+    fig.update_layout(barmode='relative', bargap=0, title=title, xaxis_title=x, yaxis_title='count',
+                      xaxis_type='log')
+    return fig
+
+
+def hexbin_map_figure(agg, lon, lat, nilai='Median', title=None):
+    # Sel hex hasil agregasi server (lihat spasial.IndeksSpasial.hexbin) digambar sebagai polygon GeoJSON
+    with span('plotly: hexbin map'):
+        geojson = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'id': str(h),
+             'geometry': {'type': 'Polygon', 'coordinates': [np.column_stack([x, y]).tolist()]}}
+            for h, x, y in zip(agg['hex'], lon, lat)
+        ]}
+        warna = np.log10(agg[nilai].clip(lower=1)) if nilai != 'Count' else agg[nilai]
+        fig = go.Figure(go.Choroplethmap(
+            geojson=geojson, locations=agg['hex'].astype(str), z=warna, colorscale='Viridis',
+            marker_line_width=0, marker_opacity=0.7,
+            customdata=np.column_stack([agg['Count'], agg['Median'], agg['Mean']]),
+            hovertemplate='Transaksi: %{customdata[0]:,}<br>Median: $%{customdata[1]:,.0f}'
+                          '<br>Rata-rata: $%{customdata[2]:,.0f}<extra></extra>',
+            colorbar_title=nilai if nilai == 'Count' else f'log10 {nilai}',
+        ))
+        fig.update_layout(title=title, margin={'l': 0, 'r': 0, 't': 40, 'b': 0},
+                          map={'style': 'open-street-map', 'zoom': 7.5,
+                               'center': {'lon': float(agg['Longitude'].mean()) if len(agg) else 0.0,
+                                          'lat': float(agg['Latitude'].mean()) if len(agg) else 0.0}})
+    return fig
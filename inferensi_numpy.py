@@ -0,0 +1,266 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+NUMPY_MODEL_PATH = 'real_estate_model.numpy.npz'
+N_VERIFIKASI = 10_000
+
+
+# ---------------------------------------------------------------------------
+# Ekspor (butuh sklearn/xgboost, dijalankan sekali saat build)
+# ---------------------------------------------------------------------------
+
+def _ekspor_langkah(transformer, arrays, prefix):
+    # Ubah satu transformer sklearn menjadi spesifikasi + array numpy
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+    from sklearn.impute import SimpleImputer
+
+    if isinstance(transformer, str) and transformer == 'passthrough':
+        return []
+    if isinstance(transformer, FunctionTransformer) and transformer.func is None:
+        return []
+    if isinstance(transformer, Pipeline):
+        langkah = []
+        for i, (_, step) in enumerate(transformer.steps):
+            langkah += _ekspor_langkah(step, arrays, f'{prefix}_{i}')
+        return langkah
+    if isinstance(transformer, SimpleImputer):
+        arrays[f'{prefix}_fill'] = np.asarray(transformer.statistics_)
+        return [{'type': 'impute', 'fill': f'{prefix}_fill'}]
+    if isinstance(transformer, StandardScaler):
+        n = transformer.n_features_in_
+        arrays[f'{prefix}_mean'] = transformer.mean_ if transformer.with_mean else np.zeros(n)
+        arrays[f'{prefix}_scale'] = transformer.scale_ if transformer.with_std else np.ones(n)
+        return [{'type': 'scale', 'mean': f'{prefix}_mean', 'scale': f'{prefix}_scale'}]
+    if isinstance(transformer, OneHotEncoder):
+        if transformer.drop is not None or transformer.handle_unknown != 'ignore':
+            raise NotImplementedError("Only OneHotEncoder(handle_unknown='ignore', drop=None) is supported")
+        nama = []
+        for i, kategori in enumerate(transformer.categories_):
+            arrays[f'{prefix}_cat{i}'] = np.asarray(kategori, dtype=str)
+            nama.append(f'{prefix}_cat{i}')
+        return [{'type': 'onehot', 'categories': nama}]
+    raise NotImplementedError(f"Unsupported transformer: {type(transformer).__name__}")
+
+
+def _ekspor_preprocessor(preprocessor, arrays):
+    spec = []
+    for i, (_, transformer, kolom) in enumerate(preprocessor.transformers_):
+        if isinstance(transformer, str) and transformer == 'drop':
+            continue
+        spec.append({'columns': list(kolom), 'steps': _ekspor_langkah(transformer, arrays, f'pre{i}')})
+    return spec
+
+
+def _ekspor_trees(booster, arrays):
+    # Semua tree digabung ke array datar; leaf menunjuk dirinya sendiri agar traversal bisa
+    # dijalankan sebanyak max_depth langkah untuk semua baris sekaligus
+    model = json.loads(booster.save_raw('json'))['learner']
+    trees = model['gradient_booster']['model']['trees']
+    left, right, feature, threshold, default_left = [], [], [], [], []
+    roots, offset, depth = [], 0, 0
+    for tree in trees:
+        kiri = np.asarray(tree['left_children'], dtype=np.int64)
+        kanan = np.asarray(tree['right_children'], dtype=np.int64)
+        node = np.arange(len(kiri))
+        leaf = kiri == -1
+        left.append(np.where(leaf, node, kiri) + offset)
+        right.append(np.where(leaf, node, kanan) + offset)
+        feature.append(np.where(leaf, 0, tree['split_indices']))
+        threshold.append(np.asarray(tree['split_conditions'], dtype=np.float32))
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        roots.append(offset)
+        offset += len(kiri)
+
+        # kedalaman tree dari array parent
+        parents = np.asarray(tree['parents'], dtype=np.int64)
+        d = np.zeros(len(kiri), dtype=np.int64)
+        for i in range(1, len(kiri)):
+            d[i] = d[parents[i]] + 1
+        depth = max(depth, int(d.max()))
+
+    arrays['tree_left'] = np.concatenate(left)
+    arrays['tree_right'] = np.concatenate(right)
+    arrays['tree_feature'] = np.concatenate(feature).astype(np.int32)
+    # Untuk leaf, split_conditions berisi nilai leaf
+    arrays['tree_threshold'] = np.concatenate(threshold)
+    arrays['tree_default_left'] = np.concatenate(default_left)
+    arrays['tree_roots'] = np.asarray(roots, dtype=np.int64)
+    base_score = float(model['learner_model_param']['base_score'])
+    return {'base_score': base_score, 'max_depth': depth}
+
+
+def ekspor(model):
+    # Pipeline(preprocessor, XGBRegressor) -> ModelNumpy
+    preprocessor = model.named_steps['preprocessor']
+    booster = model.named_steps['regressor'].get_booster()
+    arrays = {}
+    spec = {
+        'preprocessor': _ekspor_preprocessor(preprocessor, arrays),
+        # Output ColumnTransformer yang sparse membuat nilai 0 dianggap missing oleh XGBoost
+        'zero_as_missing': bool(getattr(preprocessor, 'sparse_output_', False)),
+        **_ekspor_trees(booster, arrays),
+    }
+    return ModelNumpy(spec, arrays)
+
+
+# ---------------------------------------------------------------------------
+# Inferensi (hanya numpy)
+# ---------------------------------------------------------------------------
+
+class ModelNumpy:
+    # Backend inferensi tanpa sklearn/xgboost: preprocessing + traversal tree tervektorisasi
+
+    def __init__(self, spec, arrays):
+        self.spec = spec
+        self.arrays = arrays
+        self._left = arrays['tree_left']
+        self._right = arrays['tree_right']
+        self._feature = arrays['tree_feature']
+        self._threshold = arrays['tree_threshold']
+        self._default_left = arrays['tree_default_left']
+        self._roots = arrays['tree_roots']
+
+    @classmethod
+    def muat(cls, path=NUMPY_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files}
+        spec = json.loads(str(arrays.pop('spec')))
+        return cls(spec, arrays)
+
+    def simpan(self, path=NUMPY_MODEL_PATH):
+        np.savez(path, spec=np.asarray(json.dumps(self.spec)), **self.arrays)
+
+    def transform(self, data):
+        # data: DataFrame atau dict kolom -> array
+        blok = []
+        for bagian in self.spec['preprocessor']:
+            if any(step['type'] == 'onehot' for step in bagian['steps']):
+                x = np.column_stack([np.asarray(data[k], dtype=object) for k in bagian['columns']])
+            else:
+                x = np.column_stack([np.asarray(data[k], dtype=np.float64) for k in bagian['columns']])
+            for step in bagian['steps']:
+                if step['type'] == 'impute':
+                    fill = self.arrays[step['fill']]
+                    x = np.where(np.isnan(x), fill, x)
+                elif step['type'] == 'scale':
+                    x = (x - self.arrays[step['mean']]) / self.arrays[step['scale']]
+                elif step['type'] == 'onehot':
+                    kolom = []
+                    for j, nama in enumerate(step['categories']):
+                        kategori = self.arrays[nama]
+                        nilai = x[:, j].astype(str)
+                        # kategori terurut -> searchsorted; nilai yang tidak dikenal menjadi vektor nol
+                        pos = np.clip(np.searchsorted(kategori, nilai), 0, len(kategori) - 1)
+                        cocok = kategori[pos] == nilai
+                        onehot = np.zeros((len(nilai), len(kategori)))
+                        onehot[np.nonzero(cocok)[0], pos[cocok]] = 1
+                        kolom.append(onehot)
+                    x = np.hstack(kolom)
+            blok.append(x)
+        X = np.hstack(blok).astype(np.float32)
+        if self.spec['zero_as_missing']:
+            X[X == 0] = np.nan
+        return X
+
+    def predict_transformed(self, X):
+        n = len(X)
+        baris = np.arange(n)[:, None]
+        node = np.broadcast_to(self._roots, (n, len(self._roots))).copy()
+        for _ in range(self.spec['max_depth']):
+            x = X[baris, self._feature[node]]
+            kiri = np.where(np.isnan(x), self._default_left[node], x < self._threshold[node])
+            node = np.where(kiri, self._left[node], self._right[node])
+        leaf = self._threshold[node]
+        # Jumlahkan per tree secara berurutan dalam float32, mengikuti urutan akumulasi XGBoost
+        hasil = np.full(n, self.spec['base_score'], dtype=np.float32)
+        for t in range(leaf.shape[1]):
+            hasil += leaf[:, t]
+        return hasil
+
+    def predict(self, data):
+        return self.predict_transformed(self.transform(data))
+
+
+def verifikasi(model, model_numpy, data, rtol=1e-5):
+    # Bandingkan backend numpy dengan pipeline asli
+    expected = model.predict(data)
+    actual = model_numpy.predict(data)
+    selisih = np.abs(actual - expected) / np.maximum(np.abs(expected), 1)
+    return {'checked': int(len(expected)), 'max_rel_error': float(selisih.max()),
+            'ok': bool(np.all(selisih <= rtol))}
+
+
+def data_verifikasi(model_path, n=N_VERIFIKASI):
+    import pandas as pd
+    import praproses
+    from dataset import CSV_PATH
+    return praproses.fitur(pd.read_csv(CSV_PATH, nrows=n), praproses.muat(model_path))
+
+
+def simpan_atomik(model_numpy, path=NUMPY_MODEL_PATH):
+    # Nama sementara unik di direktori tujuan: beberapa proses yang mengekspor bersamaan tidak
+    # saling menimpa, dan pembaca hanya pernah melihat file lama atau file baru yang utuh
+    fd, tmp = tempfile.mkstemp(suffix='.npz', prefix=os.path.basename(path) + '.',
+                               dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        model_numpy.simpan(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def pastikan(model_path, path=NUMPY_MODEL_PATH):
+    # File ekspor tidak ikut di git: dibuat dari .pkl saat pertama dipakai (atau jika .pkl berganti),
+    # dan hanya disimpan jika prediksinya sama dengan pipeline asli
+    from artefak import hash_file
+
+    sumber = hash_file(model_path)
+    if os.path.exists(path):
+        model_numpy = ModelNumpy.muat(path)
+        if model_numpy.spec.get('source_sha256') == sumber:
+            return model_numpy
+
+    import joblib
+    model = joblib.load(model_path)
+    model_numpy = ekspor(model)
+    hasil = verifikasi(model, model_numpy, data_verifikasi(model_path))
+    if not hasil['ok']:
+        raise ValueError(f"NumPy export does not match the pipeline (max relative error "
+                         f"{hasil['max_rel_error']:.2e})")
+    model_numpy.spec['source_sha256'] = sumber
+    simpan_atomik(model_numpy, path)
+    return model_numpy
+
+
+if __name__ == '__main__':
+    import argparse
+    import joblib
+    import pandas as pd
+    from praproses import FITUR, MODEL_PATH
+    from skor_batch import siapkan_fitur
+    from dataset import CSV_PATH
+    from artefak import hash_file
+
+    parser = argparse.ArgumentParser(description="Ekspor pipeline ke backend inferensi NumPy")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=NUMPY_MODEL_PATH)
+    parser.add_argument('--csv', default=CSV_PATH, help="Data untuk verifikasi")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    model_numpy = ekspor(model)
+    data = siapkan_fitur(pd.read_csv(args.csv))[FITUR]
+    hasil = verifikasi(model, model_numpy, data)
+    if not hasil['ok']:
+        raise SystemExit(f"Verifikasi gagal: selisih relatif maksimum {hasil['max_rel_error']:.2e}")
+    # Hash sumber dicatat seperti di pastikan(), supaya aplikasi tidak mengekspor ulang
+    model_numpy.spec['source_sha256'] = hash_file(args.model)
+    simpan_atomik(model_numpy, args.output)
+    print(f"{args.output}: {hasil['checked']:,} prediksi terverifikasi "
+          f"(selisih relatif maksimum {hasil['max_rel_error']:.2e})")
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregasi
+import dataset
+import praproses
+from skor_batch import baca_chunk
+from streaming import CHUNKSIZE
+
+# Serial Number hanya unik per Town (nomor urut tiap kantor assessor), jadi kunci dedup memakai keduanya
+KUNCI = ['Serial Number', 'Town']
+KOLOM_BACA = KUNCI + dataset.KOLOM_SUMBER + ['Location']
+
+
+def _path(csv_path, nama):
+    return os.path.join(dataset.ingest_dir(csv_path), nama)
+
+
+def hash_kunci(df):
+    # (Serial Number, Town) -> uint64; nomor seri dinormalisasi supaya '2100362' dan 2100362 sama
+    serial = pd.to_numeric(df['Serial Number'], errors='coerce').astype('Int64').astype(str)
+    town = df['Town'].astype(str).str.strip()
+    return pd.util.hash_pandas_object(pd.DataFrame({'s': serial, 't': town}), index=False).to_numpy()
+
+
+def _tulis_json(path, isi):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(isi, f, indent=2)
+    os.replace(tmp, path)
+
+
+def inisialisasi(csv_path=dataset.CSV_PATH):
+    # Sekali per CSV dasar: kunci yang sudah ada, watermark awal, dan cube dari seluruh data dasar
+    os.makedirs(dataset.ingest_dir(csv_path), exist_ok=True)
+    for nama in os.listdir(dataset.ingest_dir(csv_path)):
+        if nama.startswith('part-'):
+            os.remove(_path(csv_path, nama))
+
+    dasar = pd.read_csv(csv_path, usecols=KUNCI + ['Date Recorded'])
+    tanggal = praproses.tanggal(dasar['Date Recorded'])
+    np.save(_path(csv_path, 'kunci.npy'), np.unique(hash_kunci(dasar)))
+    agregasi.Cube.dari_dataframe(dataset.load_dataset(dataset.KOLOM_EDA, csv_path)).simpan(
+        _path(csv_path, 'cube.npz'))
+
+    state = {
+        'base_signature': dataset.signature(csv_path),
+        'versi': 0,
+        'watermark': tanggal.max().strftime('%Y-%m-%d'),
+        'rows': int(len(dasar)),
+        'parts': [],
+    }
+    _tulis_json(_path(csv_path, 'state.json'), state)
+    return state
+
+
+def ingest(path, csv_path=dataset.CSV_PATH, chunksize=CHUNKSIZE, log=None):
+    # Tambahkan transaksi baru: dedup terhadap semua kunci yang sudah pernah masuk (termasuk dalam
+    # file yang sama), bersihkan per chunk, tulis sebagai part Parquet baru, dan perbarui cube
+    # secara inkremental. Data lama tidak dibaca ulang.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    state = dataset.baca_state(csv_path) or inisialisasi(csv_path)
+    kunci = np.load(_path(csv_path, 'kunci.npy'))
+    cube = agregasi.Cube.muat(_path(csv_path, 'cube.npz'))
+    watermark = pd.Timestamp(state['watermark'])
+
+    nama_part = f"part-{state['versi'] + 1:05d}.parquet"
+    tmp = _path(csv_path, nama_part + '.tmp')
+    laporan = {'dibaca': 0, 'duplikat': 0, 'terlambat': 0, 'ditambahkan': 0}
+    writer = None
+    mulai = time.perf_counter()
+    for chunk in baca_chunk(path, chunksize, set(KOLOM_BACA)):
+        laporan['dibaca'] += len(chunk)
+        h = hash_kunci(chunk)
+        # Baris pertama dari setiap kunci baru saja yang diambil
+        _, pertama = np.unique(h, return_index=True)
+        baru = np.zeros(len(h), dtype=bool)
+        baru[pertama] = True
+        baru &= ~np.isin(h, kunci, assume_unique=False)
+        laporan['duplikat'] += int((~baru).sum())
+        if not baru.any():
+            continue
+
+        bersih = dataset.bersihkan(chunk[baru])
+        if bersih.empty:
+            continue
+        # Transaksi yang tercatat sebelum watermark tetap diterima (kuncinya baru), hanya dihitung
+        laporan['terlambat'] += int((bersih['Date Recorded'] <= watermark).sum())
+        cube.tambah(bersih)
+        kunci = np.union1d(kunci, pd.Series(h, index=chunk.index).loc[bersih.index].to_numpy())
+
+        tabel = pa.Table.from_pandas(bersih[[k for k in dataset.KOLOM_EDA + dataset.KOLOM_LOKASI
+                                             if k in bersih.columns]], preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp, tabel.schema, compression='zstd')
+        writer.write_table(tabel.cast(writer.schema))
+        laporan['ditambahkan'] += len(bersih)
+        watermark = max(watermark, bersih['Date Recorded'].max())
+        if log is not None:
+            print(f"{laporan['dibaca']:,} baris dibaca | {laporan['ditambahkan']:,} baru | "
+                  f"{laporan['dibaca'] / (time.perf_counter() - mulai):,.0f} baris/detik", file=log)
+
+    if writer is None:
+        return {**laporan, 'watermark': state['watermark'], 'versi': state['versi']}
+    writer.close()
+
+    # Part, kunci, dan cube ditulis dulu; state.json diganti terakhir sebagai commit point
+    os.replace(tmp, _path(csv_path, nama_part))
+    np.save(_path(csv_path, 'kunci.npy'), kunci)
+    cube.simpan(_path(csv_path, 'cube.npz'))
+    state = {
+        **state,
+        'versi': state['versi'] + 1,
+        'watermark': watermark.strftime('%Y-%m-%d'),
+        'rows': state['rows'] + laporan['ditambahkan'],
+        'parts': state['parts'] + [nama_part],
+    }
+    _tulis_json(_path(csv_path, 'state.json'), state)
+    return {**laporan, 'watermark': state['watermark'], 'versi': state['versi']}
+
+
+def muat_cube(df, csv_path=dataset.CSV_PATH):
+    # Cube yang dipelihara ingestion jika ada; tanpa ingestion dihitung dari dataframe seperti biasa
+    if dataset.baca_state(csv_path) is not None:
+        return agregasi.Cube.muat(_path(csv_path, 'cube.npz'))
+    return agregasi.Cube.dari_dataframe(df)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tambahkan file transaksi baru ke dataset secara inkremental")
+    parser.add_argument('paths', nargs='+', help="File transaksi baru (.csv atau .parquet)")
+    parser.add_argument('--csv', default=dataset.CSV_PATH, help="CSV dasar")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args()
+    for path in args.paths:
+        hasil = ingest(path, args.csv, args.chunksize, log=sys.stderr)
+        print(f"{path}: {hasil['ditambahkan']:,} baris baru dari {hasil['dibaca']:,} "
+              f"({hasil['duplikat']:,} duplikat, {hasil['terlambat']:,} sebelum watermark) | "
+              f"watermark {hasil['watermark']} | versi {hasil['versi']}")
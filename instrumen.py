@@ -0,0 +1,116 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+import numpy as np
+
+# Aktifkan dengan PERF_TRACE=1; saat nonaktif span() hanya mengembalikan context manager kosong
+AKTIF = os.environ.get('PERF_TRACE', '') not in ('', '0')
+LOG_PATH = os.environ.get('PERF_TRACE_LOG', os.path.join('logs', 'timing.jsonl'))
+WINDOW = 1000
+
+_NOOP = contextlib.nullcontext()
+# Streamlit menjalankan script tiap sesi di thread sendiri, jadi span per rerun disimpan per thread
+_lokal = threading.local()
+_riwayat = defaultdict(lambda: deque(maxlen=WINDOW))
+_lock = threading.Lock()
+
+
+class _Span:
+    __slots__ = ('nama', 'mulai')
+
+    def __init__(self, nama):
+        self.nama = nama
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        catat(self.nama, (time.perf_counter() - self.mulai) * 1000)
+        return False
+
+
+def span(nama):
+    if not AKTIF:
+        return _NOOP
+    return _Span(nama)
+
+
+def mulai_rerun():
+    if AKTIF:
+        _lokal.spans = []
+        _lokal.rerun = uuid.uuid4().hex[:12]
+
+
+def catat(nama, ms):
+    spans = getattr(_lokal, 'spans', None)
+    if spans is not None:
+        spans.append((nama, ms))
+    with _lock:
+        _riwayat[nama].append(ms)
+
+
+def spans_rerun():
+    return list(getattr(_lokal, 'spans', []))
+
+
+def persentil():
+    # p50/p95/p99 bergulir per nama span (WINDOW pengukuran terakhir di proses ini)
+    with _lock:
+        data = {nama: np.asarray(nilai) for nama, nilai in _riwayat.items()}
+    return {
+        nama: {'n': len(nilai), 'p50': float(np.percentile(nilai, 50)),
+               'p95': float(np.percentile(nilai, 95)), 'p99': float(np.percentile(nilai, 99))}
+        for nama, nilai in data.items() if len(nilai)
+    }
+
+
+def selesai_rerun(session_id=None, page=None):
+    # Tulis semua span rerun ini sebagai JSON lines, lengkap dengan persentil bergulir saat itu
+    if not AKTIF:
+        return
+    spans = spans_rerun()
+    if not spans:
+        return
+    ringkas = persentil()
+    waktu = time.time()
+    rerun = getattr(_lokal, 'rerun', None)
+    baris = [
+        json.dumps({'ts': waktu, 'session': session_id, 'rerun': rerun, 'page': page, 'span': nama,
+                    'ms': round(ms, 3), **{k: round(v, 3) for k, v in ringkas[nama].items() if k != 'n'}})
+        for nama, ms in spans
+    ]
+    os.makedirs(os.path.dirname(LOG_PATH) or '.', exist_ok=True)
+    with _lock, open(LOG_PATH, 'a') as f:
+        f.write('\n'.join(baris) + '\n')
+
+
+def tampilkan_panel():
+    # Panel developer di sidebar: span rerun ini + persentil bergulir
+    if not AKTIF:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Timing (developer)"):
+        spans = spans_rerun()
+        if spans:
+            st.dataframe(pd.DataFrame(spans, columns=['Span', 'ms']).round(2), hide_index=True)
+        ringkas = persentil()
+        if ringkas:
+            st.dataframe(pd.DataFrame.from_dict(ringkas, orient='index').round(2))
+
+        import cache_figur
+        statistik = cache_figur.CACHE.statistik()
+        st.caption(f"Figure cache: {statistik['entries']} figure, {statistik['bytes'] / 2**20:.1f}/"
+                   f"{statistik['budget'] / 2**20:.0f} MB, hit {statistik['hits']} / miss {statistik['misses']} "
+                   f"({statistik['hit_rate']:.0%}), {statistik['evictions']} dibuang")
+        import audit
+        statistik = audit.logger().statistik()
+        st.caption(f"Audit log: {statistik['ditulis']} ditulis ({statistik['flushes']} flush), "
+                   f"{statistik['antrian']} di antrian, {statistik['dibuang']} dibuang, {statistik['gagal']} gagal")
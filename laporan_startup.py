@@ -0,0 +1,56 @@
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+# Modul halaman yang diimpor main.py sesuai pilihan navigasi
+HALAMAN = ['tentang', 'proyek', 'eda', 'prediksi', 'kontak']
+# Library berat yang seharusnya tidak ikut termuat saat import modul halaman
+LIBRARY_BERAT = ['shap', 'xgboost', 'statsmodels', 'seaborn', 'matplotlib', 'sklearn']
+
+
+def ukur_impor(modul, baseline=('streamlit',)):
+    # Jalankan `python -X importtime` di proses baru agar cache sys.modules tidak memengaruhi hasil.
+    # Modul baseline (streamlit) diimpor lebih dulu supaya biayanya tidak dihitung ke halaman.
+    kode = ''.join(f'import {b}\n' for b in baseline) + 'import sys\nprint("---", file=sys.stderr)\n' + f'import {modul}\n'
+    proses = subprocess.run([sys.executable, '-X', 'importtime', '-c', kode],
+                            capture_output=True, text=True)
+    if proses.returncode != 0:
+        raise RuntimeError(proses.stderr.strip().splitlines()[-1])
+
+    per_paket = defaultdict(int)
+    total = 0
+    mulai = False
+    for baris in proses.stderr.splitlines():
+        if baris == '---':
+            mulai = True
+            continue
+        if not mulai or not baris.startswith('import time:') or 'self [us]' in baris:
+            continue
+        self_us, _, nama = baris[len('import time:'):].split('|')
+        paket = nama.strip().split('.')[0]
+        per_paket[paket] += int(self_us)
+        total += int(self_us)
+    return total, dict(per_paket)
+
+
+def laporan(modul_list=HALAMAN, top=10):
+    hasil = {}
+    for modul in modul_list:
+        total, per_paket = ukur_impor(modul)
+        hasil[modul] = (total, per_paket)
+        berat = [p for p in LIBRARY_BERAT if p in per_paket]
+        print(f"\n{modul}: {total / 1000:,.1f} ms")
+        for paket, us in sorted(per_paket.items(), key=lambda kv: -kv[1])[:top]:
+            print(f"  {paket:<24} {us / 1000:>9,.1f} ms")
+        if berat:
+            print(f"  ! library berat termuat saat import: {', '.join(berat)}")
+    return hasil
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rincian waktu import per modul halaman")
+    parser.add_argument('modul', nargs='*', default=HALAMAN)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    laporan(args.modul, args.top)
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import dataset
+import praproses
+from praproses import MODEL_PATH
+
+CACHE_LATIH = os.path.join(dataset.CACHE_DIR, 'latih')
+TARGET = 'Sale Amount'
+NUMERIC_FEATURES = ['Assessed Value', 'Year']
+CATEGORICAL_FEATURES = ['Property Type', 'Residential Type']
+
+# Ruang pencarian; n_estimators adalah batas atas karena memakai early stopping
+PARAM_GRID = {
+    'n_estimators': [1000],
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.05, 0.1],
+    'subsample': [0.8],
+}
+EARLY_STOPPING_ROUNDS = 30
+RANDOM_STATE = 42
+VALID_SIZE = 0.2
+TEST_SIZE = 0.2
+
+
+def muat_mentah(csv_path=dataset.CSV_PATH):
+    # Baris CSV dengan target dan tahun valid, belum dipraproses
+    df = pd.read_csv(csv_path)
+    y = praproses.angka(df[TARGET])
+    valid = y.notna() & praproses.fitur(df)['Year'].notna()
+    return df[valid].reset_index(drop=True), y[valid].reset_index(drop=True)
+
+
+def muat_data(csv_path=dataset.CSV_PATH, konfig=None):
+    df, y = muat_mentah(csv_path)
+    return praproses.fitur(df, konfig or praproses.hitung_konfig(df)), y
+
+
+def indeks_split(n, valid_size=VALID_SIZE, test_size=TEST_SIZE, seed=RANDOM_STATE):
+    # train: fit; valid: early stopping + pemilihan kandidat; test: tidak disentuh keduanya,
+    # hanya untuk metrik yang dilaporkan (metrik valid sudah optimistis karena dipakai memilih)
+    urutan = np.random.default_rng(seed).permutation(n)
+    n_test, n_valid = int(n * test_size), int(n * valid_size)
+    idx_test, idx_valid, idx_train = np.split(urutan, [n_test, n_test + n_valid])
+    return idx_train, idx_valid, idx_test
+
+
+def siapkan(csv_path=dataset.CSV_PATH):
+    # Nilai pengisi dihitung hanya dari baris train (test tidak ikut memengaruhi praproses),
+    # lalu konfigurasi yang sama dipakai untuk ketiga bagian dan disimpan bersama model
+    df, y = muat_mentah(csv_path)
+    idx_train, idx_valid, idx_test = indeks_split(len(df))
+    konfig = praproses.hitung_konfig(df.iloc[idx_train])
+    X = praproses.fitur(df, konfig)
+    return konfig, [(X.iloc[idx], y.iloc[idx]) for idx in (idx_train, idx_valid, idx_test)]
+
+
+def buat_preprocessor():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+    return ColumnTransformer([
+        ('num', 'passthrough', NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES),
+    ])
+
+
+def metrik(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    error = y_pred - y_true
+    nonzero = y_true != 0
+    return {
+        'mae': float(np.mean(np.abs(error))),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'mape': float(np.mean(np.abs(error[nonzero] / y_true[nonzero])) * 100),
+    }
+
+
+def kunci_cache(params, data_signature, konfig):
+    teks = json.dumps({'params': params, 'data': data_signature, 'praproses': praproses.sidik(konfig),
+                       'seed': RANDOM_STATE,
+                       'valid_size': VALID_SIZE, 'test_size': TEST_SIZE, 'early_stopping': EARLY_STOPPING_ROUNDS}, sort_keys=True)
+    return hashlib.sha256(teks.encode()).hexdigest()[:16]
+
+
+_data = None
+
+
+def _init_worker(data):
+    # Data train/valid dikirim sekali per proses worker, bukan per kandidat
+    global _data
+    _data = data
+
+
+def latih_satu(params, path):
+    # Satu kandidat: preprocessor + XGBRegressor (hist, early stopping pada data validasi)
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBRegressor
+
+    X_train, X_valid, y_train, y_valid = _data
+    mulai = time.perf_counter()
+    preprocessor = buat_preprocessor().fit(X_train)
+    regressor = XGBRegressor(
+        **params,
+        tree_method='hist',
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        random_state=RANDOM_STATE,
+        # Paralelisme ada di level process pool, jadi tiap model memakai satu thread
+        n_jobs=1,
+    )
+    regressor.fit(preprocessor.transform(X_train), y_train,
+                  eval_set=[(preprocessor.transform(X_valid), y_valid)], verbose=False)
+    model = Pipeline([('preprocessor', preprocessor), ('regressor', regressor)])
+
+    hasil = {
+        'params': params,
+        'best_iteration': int(regressor.best_iteration),
+        'valid': metrik(y_valid, model.predict(X_valid)),
+        'seconds': time.perf_counter() - mulai,
+    }
+    joblib.dump(model, path + '.pkl')
+    with open(path + '.json', 'w') as f:
+        json.dump(hasil, f, indent=2)
+    return hasil
+
+
+def latih_final(params, n_trees, X, y):
+    # Model yang disimpan: parameter terpilih dan jumlah tree hasil early stopping, dilatih ulang
+    # pada train+valid tanpa early stopping (clone/fit ulang tidak butuh eval_set)
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBRegressor
+
+    preprocessor = buat_preprocessor().fit(X)
+    regressor = XGBRegressor(**{**params, 'n_estimators': n_trees}, tree_method='hist',
+                             random_state=RANDOM_STATE)
+    regressor.fit(preprocessor.transform(X), y, verbose=False)
+    return Pipeline([('preprocessor', preprocessor), ('regressor', regressor)])
+
+
+def grid(param_grid=PARAM_GRID):
+    nama = sorted(param_grid)
+    return [dict(zip(nama, nilai)) for nilai in itertools.product(*(param_grid[n] for n in nama))]
+
+
+def cari(csv_path, konfig, train, valid, param_grid=PARAM_GRID, workers=None, log=sys.stderr):
+    # Hyperparameter search paralel; kandidat yang sudah pernah dilatih dibaca dari cache
+    (X_train, y_train), (X_valid, y_valid) = train, valid
+    signature = dataset.signature(csv_path)
+    os.makedirs(CACHE_LATIH, exist_ok=True)
+
+    hasil, tugas = [], {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=((X_train, X_valid, y_train, y_valid),)) as pool:
+        for params in grid(param_grid):
+            path = os.path.join(CACHE_LATIH, kunci_cache(params, signature, konfig))
+            if os.path.exists(path + '.json') and os.path.exists(path + '.pkl'):
+                with open(path + '.json') as f:
+                    hasil.append({**json.load(f), 'path': path, 'cached': True})
+                print(f"cache  {params}", file=log)
+                continue
+            future = pool.submit(latih_satu, params, path)
+            tugas[future] = path
+        for future in as_completed(tugas):
+            r = {**future.result(), 'path': tugas[future], 'cached': False}
+            print(f"latih  {r['params']} -> RMSE {r['valid']['rmse']:,.0f} "
+                  f"({r['best_iteration']} iterasi, {r['seconds']:.1f} s)", file=log)
+            hasil.append(r)
+    return sorted(hasil, key=lambda r: r['valid']['rmse'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latih ulang real_estate_model.pkl")
+    parser.add_argument('--csv', default=dataset.CSV_PATH)
+    parser.add_argument('--output', default=MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    konfig, (train, valid, (X_test, y_test)) = siapkan(args.csv)
+    terbaik = cari(args.csv, konfig, train, valid, workers=args.workers)[0]
+    X_fit, y_fit = pd.concat([train[0], valid[0]]), pd.concat([train[1], valid[1]])
+    model = latih_final(terbaik['params'], terbaik['best_iteration'] + 1, X_fit, y_fit)
+    # Data test tidak dipakai untuk fit, early stopping, seleksi, maupun nilai pengisi
+    uji = metrik(y_test, model.predict(X_test))
+    joblib.dump(model, args.output)
+    # Konfigurasi praproses (nilai pengisi, tabel kategori, format tanggal) disimpan di samping model
+    praproses.simpan(konfig, args.output)
+    print(f"Model terbaik {terbaik['params']} ({terbaik['best_iteration'] + 1} tree, dilatih ulang pada "
+          f"{len(X_fit):,} baris train+valid) -> {args.output}\n"
+          f"  valid (early stopping + seleksi): RMSE {terbaik['valid']['rmse']:,.0f}\n"
+          f"  test (held-out): MAE {uji['mae']:,.0f}, RMSE {uji['rmse']:,.0f}, MAPE {uji['mape']:.2f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+import tornado.web
+
+import audit
+import praproses
+from artefak import hash_file
+from praproses import FITUR, MODEL_PATH
+
+NUMERIK = ['Assessed Value', 'Year']
+
+
+class Statistik:
+    # Jendela bergulir untuk latency per request dan ukuran batch
+    def __init__(self, window=10_000):
+        self.latency_ms = deque(maxlen=window)
+        self.batch_size = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+
+    def catat_request(self, ms):
+        self.latency_ms.append(ms)
+        self.requests += 1
+
+    def catat_batch(self, n):
+        self.batch_size.append(n)
+        self.batches += 1
+
+    def ringkasan(self):
+        lat = np.asarray(self.latency_ms) if self.latency_ms else np.zeros(1)
+        size = np.asarray(self.batch_size) if self.batch_size else np.zeros(1)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'latency_ms': {
+                'p50': float(np.percentile(lat, 50)),
+                'p99': float(np.percentile(lat, 99)),
+                'max': float(lat.max()),
+            },
+            'batch_size': {
+                'mean': float(size.mean()),
+                'p50': float(np.percentile(size, 50)),
+                'max': int(size.max()),
+            },
+        }
+
+
+class MicroBatcher:
+    # Kumpulkan request yang datang bersamaan lalu jalankan satu predict untuk seluruh batch
+    def __init__(self, model, max_batch=256, max_wait_ms=2.0, statistik=None, model_hash=None,
+                 konfig=praproses.KONFIG_DEFAULT):
+        self.model = model
+        self.konfig = konfig
+        self.model_hash = model_hash
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.statistik = statistik or Statistik()
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def predict(self, records):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for record in records:
+            future = loop.create_future()
+            self._queue.put_nowait((record, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _kumpulkan(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            sisa = deadline - loop.time()
+            if sisa <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), sisa))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._kumpulkan()
+            try:
+                # Praproses ikut di dalam try: error di sini hanya menggagalkan batch ini, bukan task batching
+                input_df = praproses.fitur(pd.DataFrame([record for record, _ in batch], columns=FITUR),
+                                           self.konfig)
+                # predict dijalankan di thread agar event loop tetap menerima request
+                hasil = await loop.run_in_executor(None, self.model.predict, input_df)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.statistik.catat_batch(len(batch))
+            for (_, future), nilai in zip(batch, hasil):
+                if not future.done():
+                    future.set_result(float(nilai))
+
+
+def validasi(record):
+    hilang = [f for f in FITUR if f not in record]
+    if hilang:
+        raise ValueError(f"Missing features: {', '.join(hilang)}")
+    hasil = {f: record[f] for f in FITUR}
+    for f in NUMERIK:
+        hasil[f] = float(hasil[f])
+    # Kategori harus string; list/dict/angka ditolak di sini (400) supaya tidak menggagalkan
+    # record lain yang kebetulan masuk micro-batch yang sama
+    for f in praproses.KOLOM_KATEGORI:
+        if not isinstance(hasil[f], str):
+            raise ValueError(f"{f} must be a string, got {type(hasil[f]).__name__}")
+    return hasil
+
+
+class PredictHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    async def post(self):
+        mulai = time.perf_counter()
+        try:
+            body = json.loads(self.request.body)
+            # Terima satu record atau {"instances": [...]}
+            records = body['instances'] if isinstance(body, dict) and 'instances' in body else [body]
+            records = [validasi(r) for r in records]
+        except (ValueError, TypeError, KeyError) as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+
+        prediksi = await self.batcher.predict(records)
+        ms = (time.perf_counter() - mulai) * 1000
+        self.batcher.statistik.catat_request(ms)
+        log = audit.logger()
+        for record, nilai in zip(records, prediksi):
+            log.catat({**record, 'source': 'http', 'backend': 'pipeline',
+                       'model_sha256': self.batcher.model_hash, 'prediction': nilai, 'latency_ms': ms})
+        self.write({'predictions': prediksi})
+
+
+class StatsHandler(tornado.web.RequestHandler):
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    def get(self):
+        self.write({**self.batcher.statistik.ringkasan(), 'audit': audit.logger().statistik()})
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({'status': 'ok'})
+
+
+def buat_app(batcher):
+    return tornado.web.Application([
+        (r'/predict', PredictHandler, dict(batcher=batcher)),
+        (r'/stats', StatsHandler, dict(batcher=batcher)),
+        (r'/health', HealthHandler),
+    ])
+
+
+async def jalankan(model_path, port, max_batch, max_wait_ms):
+    # Model dimuat sekali untuk seluruh umur proses
+    model = joblib.load(model_path)
+    batcher = MicroBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                           model_hash=hash_file(model_path), konfig=praproses.muat(model_path))
+    batcher.start()
+    buat_app(batcher).listen(port)
+    print(f"Prediction service berjalan di http://localhost:{port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HTTP prediction service dengan micro-batching")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(jalankan(args.model, args.port, args.max_batch, args.max_wait_ms))
@@ -1,6 +1,11 @@
 import streamlit as st
 st.set_page_config(page_title="Portfolio",
                    layout="wide", page_icon=":rocket:")
+import instrumen
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Timing per rerun (aktif hanya dengan PERF_TRACE=1)
+instrumen.mulai_rerun()
 st.title("Portofolio Saya")
 st.header("Data Science & Analyst")
 st.sidebar.title("Navigasi")
@@ -11,18 +16,24 @@ page = st.sidebar.radio("Pilih Halaman",
                          "Machine Learning",
                          "Kontak"])
 
-if page == 'Kontak':
-    import kontak
-    kontak.tampilkan_kontak()
-elif page == 'Tentang Saya':
-    import tentang
-    tentang.tampilkan_tentang()
-elif page == 'Proyek':
-    import proyek
-    proyek.tampilkan_proyek()
-elif page == 'EDA':
-    import eda
-    eda.tampilkan_eda()
-elif page == 'Machine Learning':
-    import prediksi
-    prediksi.tampilkan_prediksi()
\ No newline at end of file
+try:
+    with instrumen.span(f'page: {page}'):
+        if page == 'Kontak':
+            import kontak
+            kontak.tampilkan_kontak()
+        elif page == 'Tentang Saya':
+            import tentang
+            tentang.tampilkan_tentang()
+        elif page == 'Proyek':
+            import proyek
+            proyek.tampilkan_proyek()
+        elif page == 'EDA':
+            import eda
+            eda.tampilkan_eda()
+        elif page == 'Machine Learning':
+            import prediksi
+            prediksi.tampilkan_prediksi()
+    instrumen.tampilkan_panel()
+finally:
+    ctx = get_script_run_ctx()
+    instrumen.selesai_rerun(ctx.session_id if ctx else None, page)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+MODE_NATIVE = 'native'
+MODE_SHAP = 'shap'
+
+
+def nama_fitur(model):
+    return [n.split('__', 1)[-1] for n in model.named_steps['preprocessor'].get_feature_names_out()]
+
+
+def buat_explainer(model):
+    # Struktur tree SHAP cukup dibangun sekali per model yang dimuat
+    import shap
+    return shap.TreeExplainer(model.named_steps['regressor'])
+
+
+def kontribusi_native(model, input_df, approx=False):
+    # Kontribusi per fitur langsung dari booster (pred_contribs), tanpa shap.Explainer.
+    # Input tetap sparse seperti di model.predict, jadi total kontribusi = prediksi.
+    # approx=True memakai metode Saabas (jauh lebih cepat untuk batch besar).
+    # Hasil: (values [n, n_fitur], base_values [n], data [n, n_fitur])
+    import xgboost as xgb
+    preprocessor = model.named_steps['preprocessor']
+    booster = model.named_steps['regressor'].get_booster()
+
+    transformed = preprocessor.transform(input_df)
+    contribs = booster.predict(xgb.DMatrix(transformed), pred_contribs=True, approx_contribs=approx)
+    data = transformed.toarray() if hasattr(transformed, 'toarray') else np.asarray(transformed)
+    return contribs[:, :-1], contribs[:, -1], data
+
+
+def jelaskan(model, input_df, explainer=None, mode=MODE_NATIVE):
+    # Mengembalikan shap.Explanation untuk semua baris input_df
+    import shap
+    names = nama_fitur(model)
+    if mode == MODE_NATIVE:
+        values, base_values, data = kontribusi_native(model, input_df)
+        return shap.Explanation(values=values, base_values=base_values, data=data, feature_names=names)
+
+    explainer = explainer or buat_explainer(model)
+    # Input tetap sparse: versi dense mengubah nol one-hot dari missing menjadi nilai 0,
+    # sehingga jalur tree berbeda dan total SHAP tidak sama dengan prediksi
+    transformed = model.named_steps['preprocessor'].transform(input_df)
+    explanation = explainer(transformed)
+    if hasattr(transformed, 'toarray'):
+        explanation.data = transformed.toarray()
+    explanation.feature_names = names
+    return explanation
+
+
+def kontribusi_frame(model, input_df, approx=False):
+    # Versi tabel untuk batch besar (mis. 10k baris sekaligus)
+    values, base_values, _ = kontribusi_native(model, input_df, approx)
+    hasil = pd.DataFrame(values, columns=nama_fitur(model), index=input_df.index)
+    hasil['Base Value'] = base_values
+    return hasil
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import dataset
+import penjelasan
+from artefak import hash_file
+from praproses import FITUR, MODEL_PATH
+from skor_batch import KOLOM_PREDIKSI
+
+SHAP_DIR = os.path.join(dataset.CACHE_DIR, 'shap')
+CHUNKSIZE = 20_000
+_META = b'penjelasan_global'
+
+_model = None
+
+
+def store_path(model_hash, directory=SHAP_DIR):
+    # Nama file memuat hash model: model yang berganti otomatis tidak cocok dengan store lama
+    return os.path.join(directory, f'{model_hash[:16]}.parquet')
+
+
+def ringkasan_path(model_hash, directory=SHAP_DIR):
+    return os.path.join(directory, f'{model_hash[:16]}.json')
+
+
+def _init_worker(model_path):
+    global _model
+    _model = joblib.load(model_path)
+    # Paralelisme di level proses; booster per worker cukup satu thread
+    _model.named_steps['regressor'].get_booster().set_param({'nthread': 1})
+
+
+def kontribusi_per_fitur(model, fitur):
+    # pred_contribs per kolom hasil one-hot dijumlahkan kembali ke 4 fitur asli (SHAP bersifat aditif)
+    values, base_values, _ = penjelasan.kontribusi_native(model, fitur)
+    nama = penjelasan.nama_fitur(model)
+    hasil = pd.DataFrame(index=fitur.index)
+    for f in FITUR:
+        kolom = [i for i, n in enumerate(nama) if n == f or n.startswith(f + '_')]
+        hasil[f'SHAP {f}'] = values[:, kolom].sum(axis=1).astype(np.float32)
+    hasil['Base Value'] = base_values.astype(np.float32)
+    return hasil
+
+
+def _hitung_chunk(fitur):
+    hasil = kontribusi_per_fitur(_model, fitur)
+    hasil[KOLOM_PREDIKSI] = hasil.sum(axis=1).astype(np.float32)
+    return pd.concat([fitur, hasil], axis=1)
+
+
+def ringkas(df):
+    # Ringkasan global yang dibaca halaman prediksi tanpa perhitungan ulang
+    kolom = [f'SHAP {f}' for f in FITUR]
+    global_ = df[kolom].abs().mean()
+    per_type = df.groupby('Property Type', observed=True)[kolom].apply(lambda g: g.abs().mean())
+    return {
+        'global': {k.removeprefix('SHAP '): float(v) for k, v in global_.sort_values(ascending=False).items()},
+        'per_type': {str(t): {k.removeprefix('SHAP '): float(v) for k, v in baris.items()}
+                     for t, baris in per_type.iterrows()},
+        'rows': int(len(df)),
+    }
+
+
+def bangun(model_path=MODEL_PATH, csv_path=dataset.CSV_PATH, workers=None, chunksize=CHUNKSIZE,
+           directory=SHAP_DIR, log=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model_hash = hash_file(model_path)
+    data = dataset.load_dataset(dataset.KOLOM_EDA, csv_path)
+    fitur = data[FITUR].dropna().reset_index(drop=True)
+    for kolom in ['Property Type', 'Residential Type']:
+        fitur[kolom] = fitur[kolom].astype(str)
+
+    mulai = time.perf_counter()
+    potongan = [fitur.iloc[i:i + chunksize] for i in range(0, len(fitur), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        hasil = []
+        for df in pool.map(_hitung_chunk, potongan):
+            hasil.append(df)
+            if log is not None:
+                selesai = sum(len(h) for h in hasil)
+                print(f"{selesai:,}/{len(fitur):,} baris | "
+                      f"{selesai / (time.perf_counter() - mulai):,.0f} baris/detik", file=log)
+    hasil = pd.concat(hasil, ignore_index=True)
+    hasil = hasil.astype({'Assessed Value': 'float32', 'Year': 'int16',
+                          'Property Type': 'category', 'Residential Type': 'category'})
+
+    meta = {'model_sha256': model_hash, 'data_version': dataset.versi_data(csv_path)}
+    tabel = pa.Table.from_pandas(hasil, preserve_index=False)
+    tabel = tabel.replace_schema_metadata({**(tabel.schema.metadata or {}), _META: json.dumps(meta).encode()})
+    os.makedirs(directory, exist_ok=True)
+    path = store_path(model_hash, directory)
+    pq.write_table(tabel, path + '.tmp', compression='zstd')
+    os.replace(path + '.tmp', path)
+    with open(ringkasan_path(model_hash, directory), 'w') as f:
+        json.dump({**meta, **ringkas(hasil)}, f, indent=2)
+    return path
+
+
+def muat_ringkasan(model_hash, directory=SHAP_DIR):
+    # None jika belum ada store untuk model ini
+    path = ringkasan_path(model_hash, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def muat(model_hash, columns=None, directory=SHAP_DIR):
+    import pyarrow.parquet as pq
+    path = store_path(model_hash, directory)
+    if not os.path.exists(path):
+        return None
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Hitung kontribusi SHAP untuk seluruh dataset (offline)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--csv', default=dataset.CSV_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args()
+    mulai = time.perf_counter()
+    path = bangun(args.model, args.csv, args.workers, args.chunksize, log=sys.stderr)
+    print(f"{path}: selesai dalam {time.perf_counter() - mulai:.1f} s")
@@ -1,25 +1,45 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import joblib
-# Atur backend sebelum import pyplot
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import seaborn as sns
-import shap
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.impute import SimpleImputer
+import penjelasan
+import inferensi_numpy
+import artefak
+import spasial
+import simulasi
+import cache_figur
+import penjelasan_global
+import grafik
+import evaluasi
+import dataset
+import praproses
+import audit
+import time
+from praproses import MODEL_PATH, YEAR_MIN, YEAR_MAX
+from instrumen import span
+
+# Pilihan input di sidebar (juga dipakai saat mengompilasi model ke tabel lookup)
+PROPERTY_TYPES = ['Residential', 'Condo', 'Apartements', 'Commercial', 'Industrial', 'VacantLand', 'Public Utility']
+RESIDENTIAL_TYPES = ['Single Family', 'Two Family', 'Condo', 'Three Family', 'Four Family']
+
+BACKEND_PIPELINE = 'Pipeline (XGBoost)'
+BACKEND_NUMPY = 'NumPy'
+BACKEND_ARTEFAK = 'Artefak (XGBoost native, mmap)'
+# Jumlah kurva what-if yang disimpan; kombinasi yang paling lama tidak dipakai dibuang lebih dulu
+SWEEP_CACHE = 32
+# Resolusi PNG figure matplotlib (sama dengan default st.pyplot)
+FIGURE_DPI = 200
 
-def tampilkan_prediksi():
-    st.set_page_config(
-        page_title="Real Estate Price Prediction",
-        page_icon="🏠",
-        layout="wide"
-    )
 
+def _pyplot():
+    # matplotlib baru dimuat saat grafik pertama kali dibuat
+    # Atur backend sebelum import pyplot
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def tampilkan_prediksi():
     # Custom CSS
     st.markdown("""
     <style>
@@ -46,25 +66,69 @@ def tampilkan_prediksi():
     """, unsafe_allow_html=True)
 
     # Load model with error handling
+    # Kegagalan di-raise (bukan return None) supaya tidak ikut di-cache dan dicoba ulang pada rerun berikutnya
     @st.cache_resource
-    def load_model():
-        try:
-            model = joblib.load('real_estate_model.pkl')    
-            if not (hasattr(model, 'named_steps') and 'preprocessor' in model.named_steps and 'regressor' in model.named_steps):
-                st.error("The loaded model doesn't have the expected structure.")
-                return None        
-            return model
-        except Exception as e:
-            st.error(f"Failed to load model: {str(e)}")
-            return None
+    def load_model(backend=BACKEND_PIPELINE):
+        # Backend NumPy: array hasil ekspor, tanpa sklearn/xgboost saat inferensi.
+        # Ekspor dibuat dan diverifikasi dari .pkl jika belum ada
+        if backend == BACKEND_NUMPY:
+            return inferensi_numpy.pastikan(MODEL_PATH)
+        # Artefak: booster native + array .npy yang di-mmap (dibagi antar proses worker),
+        # diekspor dari .pkl jika belum ada
+        if backend == BACKEND_ARTEFAK:
+            return artefak.pastikan(MODEL_PATH, artefak.ARTEFAK_DIR)
+        model = joblib.load(MODEL_PATH)    
+        if not (hasattr(model, 'named_steps') and 'preprocessor' in model.named_steps and 'regressor' in model.named_steps):
+            raise ValueError("The loaded model doesn't have the expected structure.")
+        return model
+
+    # Explainer dibangun sekali per model dan dipakai ulang di semua sesi
+    @st.cache_resource
+    def load_explainer(_model):
+        return penjelasan.buat_explainer(_model)
+
+    # Hash model hanya dihitung ulang jika file model berubah
+    @st.cache_data
+    def model_hash(model_signature):
+        return artefak.hash_file(MODEL_PATH)
 
-    def predict_price(model, input_data):
+    # Hash isi CSV dihitung ulang hanya jika CSV/ingestion berubah
+    @st.cache_data
+    def data_key(data_version):
+        return evaluasi.kunci_data(dataset.CSV_PATH)
+
+    # Store SHAP offline (penjelasan_global.py); dibaca sekali per proses, tidak ada perhitungan SHAP
+    @st.cache_resource
+    def load_shap_store(model_hash):
+        ringkasan = penjelasan_global.muat_ringkasan(model_hash)
+        if ringkasan is None:
+            return None, None
+        kolom = ['Assessed Value', 'Property Type', 'SHAP Assessed Value']
+        return ringkasan, penjelasan_global.muat(model_hash, columns=kolom)
+
+    # Kurva what-if per (backend, tipe, rentang); max_entries membuat cache ini LRU
+    @st.cache_data(max_entries=SWEEP_CACHE)
+    def predict_sweep(backend, property_type, residential_type, av_range, n_points):
+        with span('prediksi: sweep'):
+            return simulasi.kurva(load_model(backend), property_type, residential_type, av_range,
+                                  range(YEAR_MIN, YEAR_MAX + 1), n_points, praproses.muat(MODEL_PATH))
+
+    def predict_price(model, input_data, backend=BACKEND_PIPELINE):
         try:
+            mulai = time.perf_counter()
             # Create DataFrame from input
-            input_df = pd.DataFrame([input_data])
+            # Nilai UI dipetakan ke kategori model dengan praproses yang sama seperti saat training
+            with span('prediksi: preprocessing'):
+                input_df = praproses.fitur(pd.DataFrame([input_data]), praproses.muat(MODEL_PATH))
             
             # Make prediction
-            prediction = model.predict(input_df)
+            with span('prediksi: predict'):
+                prediction = model.predict(input_df)
+            # Audit log: hanya masuk antrian, penulisan ke disk di thread latar
+            audit.logger().catat({**input_data, 'source': 'streamlit', 'backend': backend,
+                                  'model_sha256': model_hash(dataset.signature(MODEL_PATH)),
+                                  'prediction': float(prediction[0]),
+                                  'latency_ms': (time.perf_counter() - mulai) * 1000})
             return prediction[0]
         except Exception as e:
             st.error(f"Prediction failed: {str(e)}")
@@ -76,9 +140,13 @@ def tampilkan_prediksi():
         st.markdown("Predict property prices using our optimized machine learning model")
         
         # Load model
-        model = load_model()
-        if model is None:
-            st.stop()
+        backend = st.sidebar.selectbox('Inference Backend', options=[BACKEND_PIPELINE, BACKEND_NUMPY, BACKEND_ARTEFAK])
+        with span('prediksi: load_model'):
+            try:
+                model = load_model(backend)
+            except Exception as e:
+                st.error(f"Failed to load model: {str(e)}")
+                st.stop()
         
         # Sidebar for input
         with st.sidebar:
@@ -94,19 +162,25 @@ def tampilkan_prediksi():
             
             year = st.slider(
                 'Year',
-                min_value=2017,
-                max_value=2025,
+                min_value=YEAR_MIN,
+                max_value=YEAR_MAX,
                 value=2022
             )
             
             property_type = st.selectbox(
                 'Property Type',
-                options=['Residential', 'Condo', 'Apartements', 'Commercial', 'Industrial', 'VacantLand', 'Public Utility']
+                options=PROPERTY_TYPES
             )
             
             residential_type = st.selectbox(
                 'Residential Type',
-                options=['Single Family', 'Two Family', 'Condo', 'Three Family', 'Four Family']
+                options=RESIDENTIAL_TYPES
+            )
+            
+            shap_mode = st.radio(
+                'SHAP Mode',
+                options=[penjelasan.MODE_NATIVE, penjelasan.MODE_SHAP],
+                format_func=lambda m: 'Native XGBoost (pred_contribs)' if m == penjelasan.MODE_NATIVE else 'shap.TreeExplainer'
             )
             
             if st.button('Predict Price'):
@@ -118,7 +192,7 @@ def tampilkan_prediksi():
                 }
                 
                 with st.spinner('Calculating prediction...'):
-                    prediction = predict_price(model, input_data)
+                    prediction = predict_price(model, input_data, backend)
                     if prediction is not None:
                         st.session_state.prediction = prediction
                         st.session_state.input_data = input_data
@@ -156,58 +230,125 @@ def tampilkan_prediksi():
             with col1:
                 # Price comparison chart
                 st.subheader("Price Comparison")
-                fig, ax = plt.subplots(figsize=(8, 4))
-                values = [st.session_state.input_data['Assessed Value'], st.session_state.prediction]
-                labels = ['Assessed Value', 'Predicted Price']
-                bars = ax.bar(labels, values, color=['#3498db', '#2ecc71'])
-                
-                # Add value labels
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                            f'${height:,.0f}',
-                            ha='center', va='bottom')
-                
-                ax.set_ylabel('Amount ($)')
-                st.pyplot(fig)
+                values = [st.session_state.input_data['Assessed Value'], float(st.session_state.prediction)]
+
+                def buat_comparison():
+                    with span('matplotlib: price comparison'):
+                        plt = _pyplot()
+                        fig, ax = plt.subplots(figsize=(8, 4))
+                        labels = ['Assessed Value', 'Predicted Price']
+                        bars = ax.bar(labels, values, color=['#3498db', '#2ecc71'])
+                        
+                        # Add value labels
+                        for bar in bars:
+                            height = bar.get_height()
+                            ax.text(bar.get_x() + bar.get_width()/2., height,
+                                    f'${height:,.0f}',
+                                    ha='center', va='bottom')
+                        
+                        ax.set_ylabel('Amount ($)')
+                        return fig
+
+                # PNG disimpan per nilai input/prediksi; figure matplotlib ditutup setelah dirender
+                st.image(cache_figur.png(cache_figur.kunci('price comparison', values), buat_comparison, dpi=FIGURE_DPI),
+                         use_container_width=True)
             
             with col2:
                 # Model metrics
                 st.subheader("Model Performance")
-                st.metric("Mean Absolute Error (MAE)", "$37,799")
-                st.metric("Root Mean Squared Error (RMSE)", "$52,889")
-                st.metric("Mean Absolute Percentage Error (MAPE)", "16,98%")
+                # Metrik held-out dari evaluasi.py (K-fold), di-cache per (hash model, hash data)
+                hasil_eval = evaluasi.muat_hasil(model_hash(dataset.signature(MODEL_PATH)),
+                                                 data_key(dataset.versi_data(dataset.CSV_PATH)))
+                if hasil_eval is None:
+                    st.info("No evaluation for the current model and data yet. Run `python evaluasi.py` to compute it.")
+                else:
+                    metrik = hasil_eval['overall']
+                    st.metric("Mean Absolute Error (MAE)", f"${metrik['mae']:,.0f}")
+                    st.metric("Root Mean Squared Error (RMSE)", f"${metrik['rmse']:,.0f}")
+                    st.metric("Mean Absolute Percentage Error (MAPE)", f"{metrik['mape']:.2f}%")
+                    st.caption(f"{hasil_eval['folds']}-fold cross-validation on {hasil_eval['rows']:,} transactions")
+                    with st.expander("Metrics per segment"):
+                        for judul, kunci_segmen in [('Property Type', 'per_property_type'), ('Year', 'per_year')]:
+                            st.dataframe(pd.DataFrame(hasil_eval[kunci_segmen]).T.rename_axis(judul)
+                                         [['n', 'mae', 'rmse', 'mape']].round(2))
                 
-                st.markdown("""
-                <div class="feature-importance">
-                <strong>Top Features:</strong>
-                <ol>
-                    <li>Assessed Value</li>
-                    <li>Year</li>
-                    <li>Property Type</li>
-                </ol>
-                </div>
-                """, unsafe_allow_html=True)
+                # Urutan fitur dari rata-rata |SHAP| seluruh dataset (store offline), bukan daftar tetap
+                ringkasan, _ = load_shap_store(model_hash(dataset.signature(MODEL_PATH)))
+                if ringkasan is not None:
+                    st.markdown("""
+                    <div class="feature-importance">
+                    <strong>Top Features:</strong>
+                    <ol>{}</ol>
+                    </div>
+                    """.format(''.join(f'<li>{nama}</li>' for nama in list(ringkasan['global'])[:3])),
+                        unsafe_allow_html=True)
             
+            # Comparable sales: k transaksi terdekat dari indeks spasial (KD-tree)
+            st.subheader("Comparable Sales")
+            try:
+                with span('spasial: load_index'):
+                    indeks = spasial.muat_indeks()
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    towns = list(indeks.towns.index)
+                    town = st.selectbox('Town', options=towns,
+                                        index=towns.index('Hartford') if 'Hartford' in towns else 0)
+                with col2:
+                    k = st.slider('Number of sales', min_value=5, max_value=50, value=10, step=5)
+                with col3:
+                    tahun_terakhir = int(indeks.data['Year'].max())
+                    sejak = st.slider('Sold since', min_value=int(indeks.data['Year'].min()),
+                                      max_value=tahun_terakhir, value=tahun_terakhir - 2)
+                tipe_sama = st.checkbox('Same property type only', value=False)
+                tipe_comps = praproses.petakan(st.session_state.input_data['Property Type'], 'Property Type',
+                                               praproses.muat(MODEL_PATH)) if tipe_sama else None
+
+                with span('spasial: comparable sales'):
+                    lon, lat = indeks.pusat_town(town)
+                    comps = indeks.terdekat(lon, lat, k, sejak=f'{sejak}-01-01', property_type=tipe_comps)
+                if comps.empty:
+                    st.info("No comparable sales found for this selection")
+                else:
+                    st.caption(f"{len(comps)} nearest sales to the centre of {town} since {sejak}; "
+                               f"median ${comps['Sale Amount'].median():,.0f}")
+                    st.dataframe(comps[['Town', 'Date Recorded', 'Property Type', 'Residential Type',
+                                        'Assessed Value', 'Sale Amount', 'Distance (km)']].round(2),
+                                 hide_index=True)
+            except Exception as e:
+                st.warning(f"Could not load comparable sales: {str(e)}")
+
             # SHAP explanation
             st.subheader("Feature Importance Analysis")
             try:
-                # Get the preprocessor and model from the pipeline
-                preprocessor = model.named_steps['preprocessor']
-                xgb_model = model.named_steps['regressor']
-                
+                # SHAP butuh pipeline asli (booster XGBoost)
+                if backend != BACKEND_PIPELINE:
+                    model = load_model(BACKEND_PIPELINE)
+
                 # Prepare input data for SHAP
-                input_df = pd.DataFrame([st.session_state.input_data])
-                input_transformed = preprocessor.transform(input_df)
-                
-                # Create SHAP explainer
-                explainer = shap.Explainer(xgb_model)
-                shap_values = explainer(input_transformed)
-                
-                # Plot SHAP values
-                fig = plt.figure(figsize=(10,5))
-                shap.plots.waterfall(shap_values[0], show=False)
-                st.pyplot(fig)
+                input_df = praproses.fitur(pd.DataFrame([st.session_state.input_data]),
+                                           praproses.muat(MODEL_PATH))
+
+                def buat_waterfall():
+                    # Mode native memakai pred_contribs dari booster (tanpa shap.Explainer)
+                    with span(f'shap: {shap_mode}'):
+                        if shap_mode == penjelasan.MODE_NATIVE:
+                            shap_values = penjelasan.jelaskan(model, input_df)
+                        else:
+                            shap_values = penjelasan.jelaskan(model, input_df, load_explainer(model),
+                                                              mode=penjelasan.MODE_SHAP)
+                    
+                    # Plot SHAP values
+                    with span('matplotlib: shap waterfall'):
+                        import shap
+                        plt = _pyplot()
+                        fig = plt.figure(figsize=(10,5))
+                        shap.plots.waterfall(shap_values[0], show=False)
+                        return fig
+
+                # Penjelasan + render hanya dihitung jika kombinasi input/mode ini belum ada di cache
+                kunci = cache_figur.kunci('shap waterfall', dataset.signature(MODEL_PATH), shap_mode,
+                                          st.session_state.input_data)
+                st.image(cache_figur.png(kunci, buat_waterfall, dpi=FIGURE_DPI), use_container_width=True)
 
                 
                 st.markdown("""
@@ -222,6 +363,54 @@ def tampilkan_prediksi():
                 """, unsafe_allow_html=True)
             except Exception as e:
                 st.warning(f"Could not generate SHAP explanation: {str(e)}")
+
+        # Importance global dari store SHAP offline (dihitung oleh penjelasan_global.py)
+        with st.expander("🌐 Global Feature Importance"):
+            ringkasan, store = load_shap_store(model_hash(dataset.signature(MODEL_PATH)))
+            if ringkasan is None:
+                st.info("No SHAP store for the current model yet. Run `python penjelasan_global.py` to build it.")
+            else:
+                if ringkasan['data_version'] != dataset.versi_data(dataset.CSV_PATH):
+                    st.warning("The SHAP store was computed on an older version of the dataset.")
+                st.caption(f"Mean |SHAP| over {ringkasan['rows']:,} transactions")
+                import plotly.express as px
+                importance = pd.DataFrame({'Feature': list(ringkasan['global']),
+                                           'Mean |SHAP|': list(ringkasan['global'].values())})
+                st.plotly_chart(px.bar(importance, x='Mean |SHAP|', y='Feature', orientation='h',
+                                       title='Global Feature Importance'), use_container_width=True)
+
+                sampel = grafik.stratified_sample(store, 'Property Type', grafik.MAX_POINTS)
+                st.plotly_chart(px.scatter(sampel, x='Assessed Value', y='SHAP Assessed Value',
+                                           color='Property Type', opacity=0.5,
+                                           title='Dependence: Assessed Value'), use_container_width=True)
+
+                per_type = pd.DataFrame([{'Property Type': tipe, 'Feature': fitur, 'Mean |SHAP|': nilai}
+                                         for tipe, baris in ringkasan['per_type'].items()
+                                         for fitur, nilai in baris.items()])
+                st.plotly_chart(px.bar(per_type, x='Property Type', y='Mean |SHAP|', color='Feature',
+                                       barmode='group', title='Feature Importance per Property Type'),
+                                use_container_width=True)
+
+        # What-if: harga prediksi sepanjang rentang Assessed Value untuk semua tahun sekaligus
+        with st.expander("📈 What-if Price Curves"):
+            st.markdown(f"Predicted price for **{property_type} / {residential_type}** across a range of "
+                        f"Assessed Values, one curve per year {YEAR_MIN}–{YEAR_MAX}.")
+            col1, col2 = st.columns(2)
+            with col1:
+                av_range = st.slider('Assessed Value range ($)', min_value=0, max_value=2_000_000,
+                                     value=(50_000, 1_000_000), step=10_000)
+            with col2:
+                n_points = st.select_slider('Points per curve', options=[50, 100, 200, 500], value=simulasi.N_POINTS)
+            try:
+                curves = predict_sweep(backend, property_type, residential_type, av_range, n_points)
+                import plotly.express as px
+                fig = px.line(curves, x='Assessed Value', y='Predicted Price', color='Year',
+                              title='What-if: Predicted Price vs Assessed Value',
+                              color_discrete_sequence=px.colors.sequential.Viridis)
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"{len(curves):,} grid points scored in a single predict call")
+            except Exception as e:
+                st.warning(f"Could not compute what-if curves: {str(e)}")
     main()
 
         # Model information in sidebar
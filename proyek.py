@@ -1,14 +1,7 @@
 import streamlit as st
-from PIL import Image
 import pandas as pd
 
 def tampilkan_proyek():
-    st.set_page_config(
-        page_title="Real Estate Analytics",
-        page_icon="🏠",
-        layout="wide"
-    )
-
     # CSS kustom
     st.markdown("""
     <style>
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+import praproses
+from praproses import FITUR
+
+N_POINTS = 200
+
+
+def grid(property_type, residential_type, av_range, years, n_points=N_POINTS):
+    # Semua kombinasi Assessed Value x Year untuk satu tipe properti, dibangun sebagai satu frame
+    av = np.linspace(av_range[0], av_range[1], n_points)
+    years = np.asarray(list(years))
+    return pd.DataFrame({
+        'Assessed Value': np.tile(av, len(years)),
+        'Year': np.repeat(years, len(av)),
+        'Property Type': property_type,
+        'Residential Type': residential_type,
+    })[FITUR]
+
+
+def kurva(model, property_type, residential_type, av_range, years, n_points=N_POINTS,
+          konfig=praproses.KONFIG_DEFAULT):
+    # Satu panggilan model.predict untuk seluruh grid (bukan satu predict per titik)
+    data = grid(property_type, residential_type, av_range, years, n_points)
+    prediksi = model.predict(praproses.fitur(data, konfig))
+    return data.assign(**{'Predicted Price': np.asarray(prediksi, dtype=np.float64)})
@@ -0,0 +1,140 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import praproses
+from praproses import FITUR, MODEL_PATH
+
+KOLOM_PREDIKSI = 'Predicted Price'
+
+_model = None
+_konfig = None
+
+
+def siapkan_fitur(chunk, konfig=None):
+    # Ubah baris mentah (format real_estate_sample_30k.csv) menjadi 4 fitur model, memakai
+    # nilai pengisi dan tabel kategori yang disimpan bersama model
+    return praproses.fitur(chunk, konfig or praproses.muat(MODEL_PATH))
+
+
+def _init_worker(model_path):
+    # Model dimuat sekali per proses worker, bukan per chunk
+    global _model, _konfig
+    _model = joblib.load(model_path)
+    _konfig = praproses.muat(model_path)
+
+
+def skor_chunk(chunk, keep=()):
+    fitur = siapkan_fitur(chunk, _konfig)
+    hasil = chunk[[k for k in keep if k in chunk.columns]].copy()
+    for kolom in FITUR:
+        hasil[kolom] = fitur[kolom]
+    # Tipe output tetap di semua chunk: nilai kosong/tanggal rusak di satu chunk tidak boleh
+    # mengubah int menjadi double di tengah file Parquet
+    hasil = hasil.astype({'Assessed Value': 'float64', 'Year': 'float64'})
+    hasil[KOLOM_PREDIKSI] = _model.predict(fitur[FITUR]).astype(np.float32)
+    return hasil
+
+
+def baca_chunk(path, chunksize, kolom):
+    # Input dibaca bertahap agar memori tidak bergantung pada ukuran file
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        berkas = pq.ParquetFile(path)
+        kolom = [k for k in kolom if k in berkas.schema_arrow.names]
+        for batch in berkas.iter_batches(batch_size=chunksize, columns=kolom):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=lambda k: k in kolom)
+
+
+class PenulisHasil:
+    # Menulis hasil per chunk secara inkremental ke CSV atau Parquet
+    def __init__(self, path):
+        self.path = path
+        self._parquet = path.endswith('.parquet')
+        self._writer = None
+        self._header = True
+
+    def tulis(self, df):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabel = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, tabel.schema)
+            # Kolom yang disalin (--keep) tetap bisa berbeda tipe antar chunk; samakan dengan chunk pertama
+            self._writer.write_table(tabel.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def tutup(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def skor_file(input_path, output_path, model_path=MODEL_PATH, chunksize=100_000,
+              workers=None, keep=('Serial Number',), log=sys.stderr):
+    workers = workers or os.cpu_count() or 1
+    kolom = set(FITUR) | {'Date Recorded'} | set(keep)
+    penulis = PenulisHasil(output_path)
+    total = 0
+    mulai = time.perf_counter()
+
+    def catat(df):
+        nonlocal total
+        penulis.tulis(df)
+        total += len(df)
+        durasi = time.perf_counter() - mulai
+        print(f"{total:,} baris | {total / durasi:,.0f} baris/detik", file=log)
+
+    try:
+        if workers == 1:
+            _init_worker(model_path)
+            for chunk in baca_chunk(input_path, chunksize, kolom):
+                catat(skor_chunk(chunk, keep))
+        else:
+            # Batasi jumlah chunk yang sedang diproses supaya memori tetap terbatas
+            antrean = deque()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path,)) as pool:
+                for chunk in baca_chunk(input_path, chunksize, kolom):
+                    antrean.append(pool.submit(skor_chunk, chunk, keep))
+                    if len(antrean) >= 2 * workers:
+                        catat(antrean.popleft().result())
+                while antrean:
+                    catat(antrean.popleft().result())
+    finally:
+        penulis.tutup()
+
+    durasi = time.perf_counter() - mulai
+    return {'rows': total, 'seconds': durasi, 'rows_per_sec': total / durasi if durasi else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch scoring real_estate_model.pkl untuk file CSV/Parquet")
+    parser.add_argument('input', help="File input (.csv atau .parquet)")
+    parser.add_argument('output', help="File output (.csv atau .parquet)")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--keep', nargs='*', default=['Serial Number'],
+                        help="Kolom input yang ikut disalin ke output")
+    args = parser.parse_args(argv)
+
+    ringkasan = skor_file(args.input, args.output, args.model, args.chunksize,
+                          args.workers, tuple(args.keep))
+    print(f"Selesai: {ringkasan['rows']:,} baris dalam {ringkasan['seconds']:.2f} detik "
+          f"({ringkasan['rows_per_sec']:,.0f} baris/detik)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
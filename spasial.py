@@ -0,0 +1,177 @@
+import argparse
+import functools
+import time
+
+import numpy as np
+import pandas as pd
+
+import dataset
+
+RADIUS_BUMI_KM = 6371.0088
+HEX_KM = 2.0
+# Batas kandidat KD-tree per query sebelum beralih ke scan atas baris yang lolos filter
+MAX_KANDIDAT = 4096
+# Offset supaya koordinat hex (q, r) bisa digabung menjadi satu kunci int64
+_HEX_OFFSET = 1 << 20
+_SQRT3 = np.sqrt(3.0)
+
+
+class IndeksSpasial:
+    # KD-tree atas koordinat transaksi (km, proyeksi equirectangular di sekitar lintang median data).
+    # Untuk wilayah seukuran satu negara bagian distorsi jaraknya < 1%.
+
+    def __init__(self, df):
+        from scipy.spatial import cKDTree
+
+        valid = df['Longitude'].notna() & df['Latitude'].notna()
+        self.data = df[valid].reset_index(drop=True)
+        self.lat0 = float(np.median(self.data['Latitude'])) if len(self.data) else 0.0
+        self.xy = self.proyeksi(self.data['Longitude'].to_numpy(), self.data['Latitude'].to_numpy())
+        self._tanggal = self.data['Date Recorded'].to_numpy()
+        self._tipe = self.data['Property Type'].cat.codes.to_numpy()
+        self.tree = cKDTree(self.xy, leafsize=32, balanced_tree=False, compact_nodes=False)
+        self.towns = (self.data.groupby('Town', observed=True)[['Longitude', 'Latitude']].median()
+                      if 'Town' in self.data.columns else pd.DataFrame(columns=['Longitude', 'Latitude']))
+
+    def proyeksi(self, lon, lat):
+        skala = np.radians(1.0) * RADIUS_BUMI_KM
+        x = np.asarray(lon, dtype=np.float64) * skala * np.cos(np.radians(self.lat0))
+        y = np.asarray(lat, dtype=np.float64) * skala
+        return np.column_stack([x, y])
+
+    def balik(self, xy):
+        skala = np.radians(1.0) * RADIUS_BUMI_KM
+        return xy[:, 0] / (skala * np.cos(np.radians(self.lat0))), xy[:, 1] / skala
+
+    def pusat_town(self, town):
+        lon, lat = self.towns.loc[town]
+        return float(lon), float(lat)
+
+    def cari(self, lon, lat, k=10, sejak=None, property_type=None):
+        # Indeks dan jarak (km) k transaksi terdekat. Filter dicek pada kandidat hasil query dan
+        # k_query dilipatgandakan bila kurang; untuk filter yang sangat selektif baru jatuh ke scan
+        n = len(self.data)
+        titik = self.proyeksi([lon], [lat])[0]
+        batas = None if sejak is None else pd.Timestamp(sejak).to_datetime64()
+        kode = None
+        if property_type is not None:
+            kategori = self.data['Property Type'].cat.categories
+            if property_type not in kategori:
+                return np.empty(0), np.empty(0, dtype=np.int64)
+            kode = kategori.get_loc(property_type)
+
+        def lolos(idx):
+            pilih = np.ones(len(idx), dtype=bool)
+            if batas is not None:
+                pilih &= self._tanggal[idx] >= batas
+            if kode is not None:
+                pilih &= self._tipe[idx] == kode
+            return pilih
+
+        k_query = min(n, k if batas is None and kode is None else 4 * k)
+        while k_query and k_query <= MAX_KANDIDAT:
+            jarak, idx = self.tree.query(titik, k=k_query)
+            jarak, idx = np.atleast_1d(jarak), np.atleast_1d(idx)
+            pilih = lolos(idx)
+            if pilih.sum() >= k or k_query == n:
+                return jarak[pilih][:k], idx[pilih][:k]
+            k_query = min(n, k_query * 4)
+
+        idx = np.flatnonzero(lolos(np.arange(n)))
+        jarak = np.hypot(*(self.xy[idx] - titik).T)
+        if len(idx) > k:
+            dekat = np.argpartition(jarak, k)[:k]
+            jarak, idx = jarak[dekat], idx[dekat]
+        urutan = np.argsort(jarak, kind='stable')
+        return jarak[urutan], idx[urutan]
+
+    def terdekat(self, lon, lat, k=10, sejak=None, property_type=None):
+        jarak, idx = self.cari(lon, lat, k, sejak, property_type)
+        return self.data.iloc[idx].assign(**{'Distance (km)': jarak}).reset_index(drop=True)
+
+    def hexbin(self, ukuran_km=HEX_KM, nilai='Sale Amount', mask=None):
+        # Agregasi per sel hex di server: hanya sel (bukan titik) yang dikirim ke browser
+        xy = self.xy if mask is None else self.xy[mask]
+        harga = self.data[nilai].to_numpy(dtype=np.float64)
+        harga = harga if mask is None else harga[mask]
+        kolom = ['hex', 'Longitude', 'Latitude', 'Count', 'Median', 'Mean']
+        if len(xy) == 0:
+            return pd.DataFrame(columns=kolom)
+
+        q, r = hex_axial(xy, ukuran_km)
+        kunci = (q + _HEX_OFFSET) * (2 * _HEX_OFFSET) + (r + _HEX_OFFSET)
+        unik, inverse = np.unique(kunci, return_inverse=True)
+        # groupby berbasis hash: median sebenarnya (rata-rata dua nilai tengah), tanpa lexsort penuh
+        agg = pd.Series(harga).groupby(inverse).agg(['count', 'median', 'mean'])
+
+        hq, hr = unik // (2 * _HEX_OFFSET) - _HEX_OFFSET, unik % (2 * _HEX_OFFSET) - _HEX_OFFSET
+        lon, lat = self.balik(hex_pusat(hq, hr, ukuran_km))
+        return pd.DataFrame({'hex': unik, 'Longitude': lon, 'Latitude': lat,
+                             'Count': agg['count'].to_numpy(), 'Median': agg['median'].to_numpy(),
+                             'Mean': agg['mean'].to_numpy()}, columns=kolom)
+
+    def hex_polygon(self, agg, ukuran_km=HEX_KM):
+        # Enam titik sudut tiap sel (lon, lat), dipakai sebagai GeoJSON di peta
+        hq = agg['hex'].to_numpy() // (2 * _HEX_OFFSET) - _HEX_OFFSET
+        hr = agg['hex'].to_numpy() % (2 * _HEX_OFFSET) - _HEX_OFFSET
+        pusat = hex_pusat(hq, hr, ukuran_km)
+        sudut = np.radians(30 + 60 * np.arange(7))
+        x = pusat[:, [0]] + ukuran_km * np.cos(sudut)
+        y = pusat[:, [1]] + ukuran_km * np.sin(sudut)
+        lon, lat = self.balik(np.column_stack([x.ravel(), y.ravel()]))
+        return lon.reshape(x.shape), lat.reshape(y.shape)
+
+
+def hex_axial(xy, ukuran_km):
+    # Koordinat axial hex pointy-top lalu pembulatan cube coordinate (vektorisasi penuh)
+    fq = (_SQRT3 / 3 * xy[:, 0] - xy[:, 1] / 3) / ukuran_km
+    fr = (2 / 3 * xy[:, 1]) / ukuran_km
+    fs = -fq - fr
+    q, r, s = np.round(fq), np.round(fr), np.round(fs)
+    dq, dr, ds = np.abs(q - fq), np.abs(r - fr), np.abs(s - fs)
+    ganti_q = (dq > dr) & (dq > ds)
+    ganti_r = ~ganti_q & (dr > ds)
+    q = np.where(ganti_q, -r - s, q)
+    r = np.where(ganti_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+
+def hex_pusat(q, r, ukuran_km):
+    x = ukuran_km * _SQRT3 * (q + r / 2)
+    y = ukuran_km * 1.5 * r
+    return np.column_stack([x, y])
+
+
+@functools.lru_cache(maxsize=2)
+def _indeks(csv_path, source_signature):
+    return IndeksSpasial(dataset.load_dataset(dataset.KOLOM_EDA + dataset.KOLOM_LOKASI, csv_path))
+
+
+def muat_indeks(csv_path=dataset.CSV_PATH):
+    # Satu indeks per proses (dipakai bersama halaman EDA dan prediksi), dibangun ulang jika CSV berubah
+    return _indeks(csv_path, dataset.versi_data(csv_path))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Uji kecepatan query comparable sales")
+    parser.add_argument('--csv', default=dataset.CSV_PATH)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    mulai = time.perf_counter()
+    indeks = muat_indeks(args.csv)
+    print(f"Indeks {len(indeks.data):,} titik dibangun dalam {time.perf_counter() - mulai:.2f} s")
+
+    rng = np.random.default_rng(0)
+    sampel = indeks.data.iloc[rng.integers(0, len(indeks.data), args.queries)]
+    titik = sampel[['Longitude', 'Latitude']].to_numpy()
+    mulai = time.perf_counter()
+    for lon, lat in titik:
+        indeks.cari(lon, lat, args.k)
+    kd = (time.perf_counter() - mulai) / len(titik) * 1000
+    mulai = time.perf_counter()
+    for xy in indeks.proyeksi(titik[:50, 0], titik[:50, 1]):
+        np.argpartition(np.hypot(*(indeks.xy - xy).T), args.k)[:args.k]
+    scan = (time.perf_counter() - mulai) / min(50, len(titik)) * 1000
+    print(f"KD-tree: {kd:.3f} ms/query | scan penuh: {scan:.3f} ms/query")
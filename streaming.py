@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+
+import agregasi
+import dataset
+from skor_batch import baca_chunk
+
+CHUNKSIZE = 250_000
+
+
+def cube_path(path):
+    nama = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(dataset.CACHE_DIR, f'{nama}.cube.npz')
+
+
+def chunk_bersih(path, chunksize=CHUNKSIZE):
+    # File dibaca per chunk/record batch; memori puncak sebanding dengan chunksize, bukan ukuran file
+    for chunk in baca_chunk(path, chunksize, set(dataset.KOLOM_SUMBER)):
+        yield dataset.bersihkan(chunk)
+
+
+def bangun_cube(path, chunksize=CHUNKSIZE, log=None):
+    # Satu kali lewat: setiap chunk langsung diakumulasi ke cube (count, sum, sketch kuantil, OLS)
+    cube = agregasi.Cube.kosong([], [])
+    total = 0
+    mulai = time.perf_counter()
+    for chunk in chunk_bersih(path, chunksize):
+        cube.tambah(chunk)
+        total += len(chunk)
+        if log is not None:
+            print(f"{total:,} baris | {total / (time.perf_counter() - mulai):,.0f} baris/detik", file=log)
+    return cube
+
+
+def muat_cube(path, chunksize=CHUNKSIZE, log=None):
+    # Cube disimpan di cache/ dan dibangun ulang hanya jika file sumber berubah
+    target = cube_path(path)
+    signature = dataset.signature(path)
+    penanda = target + '.sig'
+    if os.path.exists(target) and os.path.exists(penanda):
+        with open(penanda) as f:
+            if f.read() == signature:
+                return agregasi.Cube.muat(target)
+
+    cube = bangun_cube(path, chunksize, log)
+    os.makedirs(dataset.CACHE_DIR, exist_ok=True)
+    cube.simpan(target)
+    with open(penanda, 'w') as f:
+        f.write(signature)
+    return cube
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bangun cube agregat dari file besar secara streaming")
+    parser.add_argument('path', help="File transaksi (.csv atau .parquet)")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    args = parser.parse_args()
+    cube = muat_cube(args.path, args.chunksize, log=sys.stderr)
+    print(f"{cube_path(args.path)}: {int(cube.rows.sum()):,} baris, "
+          f"{len(cube.years)} tahun x {len(cube.types)} tipe properti")
@@ -0,0 +1,178 @@
+import argparse
+import bisect
+import json
+
+import numpy as np
+
+TABEL_PATH = 'real_estate_model.lut.npz'
+# Kategori yang tidak dikenal OneHotEncoder(handle_unknown='ignore') selalu menjadi vektor nol,
+# jadi semuanya bisa diwakili satu baris tabel
+UNKNOWN = '\x00unknown'
+
+
+class TabelInterval:
+    # Model yang dikompilasi: untuk tiap kombinasi (Year, Property Type, Residential Type)
+    # prediksi adalah fungsi tangga dari Assessed Value dengan breakpoint `thresholds`.
+    # Saat serve hanya butuh numpy (tanpa xgboost/sklearn).
+
+    def __init__(self, thresholds, values, zero_values, nan_values, years, property_types, residential_types):
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.zero_values = np.asarray(zero_values, dtype=np.float32)
+        self.nan_values = np.asarray(nan_values, dtype=np.float32)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.property_types = np.asarray(property_types, dtype=str)
+        self.residential_types = np.asarray(residential_types, dtype=str)
+        self._indeks = {
+            (int(y), p, r): i
+            for i, (y, p, r) in enumerate(zip(self.years, self.property_types, self.residential_types))
+        }
+        self._pt_dikenal = set(self.property_types) - {UNKNOWN}
+        self._rt_dikenal = set(self.residential_types) - {UNKNOWN}
+        self._thresholds_list = self.thresholds.astype(np.float64).tolist()
+
+    @classmethod
+    def muat(cls, path=TABEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{k: data[k] for k in data.files})
+
+    def simpan(self, path=TABEL_PATH):
+        np.savez(path, thresholds=self.thresholds, values=self.values, zero_values=self.zero_values,
+                 nan_values=self.nan_values, years=self.years, property_types=self.property_types,
+                 residential_types=self.residential_types)
+
+    def _baris(self, year, property_type, residential_type):
+        property_type = property_type if property_type in self._pt_dikenal else UNKNOWN
+        residential_type = residential_type if residential_type in self._rt_dikenal else UNKNOWN
+        # int() akan memotong 2021.5 menjadi 2021 tanpa error; tahun harus bilangan bulat
+        if not float(year).is_integer():
+            raise ValueError(f"Year must be a whole number, got {year!r}")
+        try:
+            return self._indeks[(int(year), property_type, residential_type)]
+        except KeyError:
+            raise ValueError(f"Year {year} is outside the compiled range") from None
+
+    def predict_batch(self, assessed_values, years, property_types, residential_types):
+        x = np.asarray(assessed_values, dtype=np.float32)
+        baris = np.fromiter((self._baris(y, p, r) for y, p, r in zip(years, property_types, residential_types)),
+                            dtype=np.int64, count=len(x))
+        # x < threshold -> cabang kiri (aturan split XGBoost), jadi posisi = searchsorted(side='right')
+        kolom = np.searchsorted(self.thresholds, x, side='right')
+        hasil = self.values[baris, kolom]
+        hasil = np.where(x == 0, self.zero_values[baris], hasil)
+        return np.where(np.isnan(x), self.nan_values[baris], hasil)
+
+    def predict(self, assessed_value, year, property_type, residential_type):
+        # Jalur satu baris tanpa alokasi array: bisect pada list threshold
+        baris = self._baris(year, property_type, residential_type)
+        x = float(np.float32(assessed_value))
+        if x == 0:
+            return float(self.zero_values[baris])
+        if x != x:
+            return float(self.nan_values[baris])
+        return float(self.values[baris, bisect.bisect_right(self._thresholds_list, x)])
+
+
+def _thresholds(model, fitur='Assessed Value'):
+    # Ambil semua threshold split pada Assessed Value langsung dari JSON booster (presisi float32 penuh)
+    preprocessor = model.named_steps['preprocessor']
+    nama = [n.split('__', 1)[-1] for n in preprocessor.get_feature_names_out()]
+    indeks = nama.index(fitur)
+    booster = model.named_steps['regressor'].get_booster()
+    trees = json.loads(booster.save_raw('json'))['learner']['gradient_booster']['model']['trees']
+    nilai = [
+        kondisi
+        for tree in trees
+        for split, kondisi, kiri in zip(tree['split_indices'], tree['split_conditions'], tree['left_children'])
+        if kiri != -1 and split == indeks
+    ]
+    return np.unique(np.asarray(nilai, dtype=np.float32))
+
+
+def _wakil(thresholds):
+    # Satu titik per interval: di bawah threshold pertama, lalu tepat di setiap threshold
+    pertama = np.float32(min(thresholds[0], 0) - 1) if len(thresholds) else np.float32(-1)
+    wakil = np.concatenate([[pertama], thresholds]).astype(np.float32)
+    # 0 diperlakukan khusus (bisa menjadi missing pada input sparse), jadi hindari sebagai wakil
+    nol = wakil == 0
+    wakil[nol] = np.nextafter(np.float32(0), np.float32(1))
+    return wakil
+
+
+def kombinasi(model, years=None, property_types=None, residential_types=None):
+    import praproses
+    encoder = model.named_steps['preprocessor'].named_transformers_['cat']
+    kategori_pt, kategori_rt = [list(c) for c in encoder.categories_]
+    years = years or range(praproses.YEAR_MIN, praproses.YEAR_MAX + 1)
+    property_types = property_types or kategori_pt + [UNKNOWN]
+    residential_types = residential_types or kategori_rt + [UNKNOWN]
+    return [(y, p, r) for y in years for p in property_types for r in residential_types]
+
+
+def _frame(x, combos):
+    import pandas as pd
+    n = len(x)
+    return pd.DataFrame({
+        'Assessed Value': np.tile(x.astype(np.float64), len(combos)),
+        'Year': np.repeat([c[0] for c in combos], n),
+        'Property Type': np.repeat([c[1] for c in combos], n),
+        'Residential Type': np.repeat([c[2] for c in combos], n),
+    })
+
+
+def kompilasi(model, combos=None):
+    combos = combos or kombinasi(model)
+    thresholds = _thresholds(model)
+    # Titik evaluasi: wakil tiap interval + 0 + NaN, semua kombinasi dalam satu panggilan predict
+    x = np.concatenate([_wakil(thresholds), [0, np.nan]]).astype(np.float32)
+    pred = model.predict(_frame(x, combos)).astype(np.float32).reshape(len(combos), len(x))
+    return TabelInterval(
+        thresholds=thresholds,
+        values=pred[:, :-2],
+        zero_values=pred[:, -2],
+        nan_values=pred[:, -1],
+        years=[c[0] for c in combos],
+        property_types=[c[1] for c in combos],
+        residential_types=[c[2] for c in combos],
+    )
+
+
+def verifikasi(model, tabel, n_random=200, seed=0):
+    # Bandingkan tabel dengan model.predict secara bit-identik: di setiap threshold,
+    # tepat di sebelah kiri/kanannya, dan pada nilai acak
+    rng = np.random.default_rng(seed)
+    t = tabel.thresholds
+    x = np.concatenate([
+        t, np.nextafter(t, np.float32(-np.inf)), np.nextafter(t, np.float32(np.inf)),
+        rng.uniform(-1e5, max(float(t.max()) * 1.5, 1e6) if len(t) else 1e6, n_random),
+        [0, np.nan, -1, 1e9],
+    ]).astype(np.float32)
+    combos = list(zip(tabel.years.tolist(), tabel.property_types.tolist(), tabel.residential_types.tolist()))
+    # Kategori UNKNOWN diuji dengan string yang benar-benar tidak ada di encoder
+    combos_uji = [(y, 'Tidak Dikenal' if p == UNKNOWN else p, 'Tidak Dikenal' if r == UNKNOWN else r)
+                  for y, p, r in combos]
+    frame = _frame(x, combos_uji)
+    expected = model.predict(frame).astype(np.float32)
+    actual = tabel.predict_batch(frame['Assessed Value'], frame['Year'], frame['Property Type'],
+                                 frame['Residential Type'])
+    beda = expected.view(np.uint32) != actual.view(np.uint32)
+    return {'checked': int(len(expected)), 'mismatches': int(beda.sum())}
+
+
+if __name__ == '__main__':
+    import joblib
+    from praproses import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Kompilasi model ke tabel lookup interval")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=TABEL_PATH)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    tabel = kompilasi(model)
+    hasil = verifikasi(model, tabel)
+    if hasil['mismatches']:
+        raise SystemExit(f"Verifikasi gagal: {hasil['mismatches']} dari {hasil['checked']} prediksi berbeda")
+    tabel.simpan(args.output)
+    print(f"{args.output}: {len(tabel.years)} kombinasi x {len(tabel.thresholds) + 1} interval, "
+          f"{hasil['checked']:,} prediksi terverifikasi identik")
@@ -0,0 +1,75 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+# Ukur memori per sesi: N sesi Streamlit (AppTest) dibuka bersamaan dalam satu proses,
+# masing-masing membuka halaman dan menggeser filter, lalu selisih memori dibagi N
+
+
+def rss_mb():
+    # VmRSS dari /proc (Linux); di platform lain hanya angka tracemalloc yang dilaporkan
+    try:
+        with open('/proc/self/status') as f:
+            for baris in f:
+                if baris.startswith('VmRSS:'):
+                    return int(baris.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+
+def buka_sesi(page, year_range):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file('main.py', default_timeout=120)
+    at.run()
+    at.sidebar.radio[0].set_value(page).run()
+    if year_range is not None and at.sidebar.slider:
+        at.sidebar.slider[0].set_value(year_range).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def ukur(sesi=10, page='EDA', year_range=(2018, 2021), log=sys.stderr):
+    sys.path.insert(0, os.getcwd())
+    # Sesi pertama memuat modul dan cache bersama; tidak dihitung sebagai biaya per sesi
+    pemanasan = buka_sesi(page, year_range)
+    gc.collect()
+    tracemalloc.start()
+    awal_rss, awal_py = rss_mb(), tracemalloc.get_traced_memory()[0]
+
+    aktif = [pemanasan]
+    puncak = []
+    for i in range(sesi):
+        # Puncak alokasi selama sesi dibuka = salinan sementara yang dibuat tiap rerun
+        sebelum = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        aktif.append(buka_sesi(page, year_range))
+        puncak.append((tracemalloc.get_traced_memory()[1] - sebelum) / 2**20)
+        gc.collect()
+        print(f"sesi {i + 1:>3}: RSS {rss_mb():8.1f} MB | "
+              f"heap Python {(tracemalloc.get_traced_memory()[0] - awal_py) / 2**20:8.1f} MB | "
+              f"puncak rerun {puncak[-1]:6.1f} MB", file=log)
+
+    hasil = {
+        'sesi': sesi,
+        'rss_per_sesi_mb': (rss_mb() - awal_rss) / sesi,
+        'heap_per_sesi_mb': (tracemalloc.get_traced_memory()[0] - awal_py) / 2**20 / sesi,
+        'puncak_rerun_mb': sum(puncak) / sesi,
+    }
+    tracemalloc.stop()
+    return hasil
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ukur pertambahan memori per sesi Streamlit")
+    parser.add_argument('--sesi', type=int, default=10)
+    parser.add_argument('--page', default='EDA')
+    args = parser.parse_args()
+    hasil = ukur(args.sesi, args.page)
+    print(f"{args.page}: {hasil['rss_per_sesi_mb']:.2f} MB RSS / sesi, "
+          f"{hasil['heap_per_sesi_mb']:.2f} MB heap Python / sesi, "
+          f"puncak {hasil['puncak_rerun_mb']:.2f} MB per pembukaan sesi ({hasil['sesi']} sesi)")